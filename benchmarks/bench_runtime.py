@@ -0,0 +1,109 @@
+"""Сравнение профилей выполнения: стоимость разбора одного события gateway.
+
+Запуск: python benchmarks/bench_runtime.py
+
+Меряет горячий путь каждого события: распаковку zlib-stream и разбор JSON
+(json против orjson — discord.py сам использует orjson, если тот установлен).
+Нагрузку под реальным трафиком бот сам печатает раз в несколько минут
+строкой «📊 [профиль] ... на событие: N мкс».
+"""
+import json
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ITERATIONS = 20000
+
+# Типичные события, которые получает бот
+SAMPLE_EVENTS = {
+    "VOICE_STATE_UPDATE": {
+        "op": 0, "s": 1024, "t": "VOICE_STATE_UPDATE",
+        "d": {
+            "guild_id": "1439572595258425344", "channel_id": "1439645769744519260",
+            "user_id": "389017023471517697", "session_id": "c8f2d9b1a7e34f0e9d6b5a4c3b2a1f0e",
+            "deaf": False, "mute": False, "self_deaf": False, "self_mute": True,
+            "self_video": False, "suppress": False, "request_to_speak_timestamp": None,
+            "member": {
+                "user": {"id": "389017023471517697", "username": "player", "global_name": "Player",
+                         "avatar": "a1b2c3d4e5f60718293a4b5c6d7e8f90", "discriminator": "0"},
+                "roles": ["1439646749550575636"], "joined_at": "2025-11-16T12:00:00.000000+00:00",
+                "nick": "ProPlayer (Алексей)", "deaf": False, "mute": False, "flags": 0,
+            },
+        },
+    },
+    "MESSAGE_CREATE": {
+        "op": 0, "s": 1025, "t": "MESSAGE_CREATE",
+        "d": {
+            "id": "1440000000000000000", "channel_id": "1439646366899896360",
+            "guild_id": "1439572595258425344", "content": "!i ищем двоих в сквад, нужен микрофон",
+            "author": {"id": "389017023471517697", "username": "player", "global_name": "Player",
+                       "avatar": None, "discriminator": "0"},
+            "member": {"roles": ["1439646749550575636"], "joined_at": "2025-11-16T12:00:00.000000+00:00"},
+            "timestamp": "2025-11-20T18:30:00.000000+00:00", "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": [], "pinned": False, "type": 0,
+        },
+    },
+    "GUILD_MEMBER_UPDATE": {
+        "op": 0, "s": 1026, "t": "GUILD_MEMBER_UPDATE",
+        "d": {
+            "guild_id": "1439572595258425344",
+            "user": {"id": "389017023471517697", "username": "player", "avatar": None},
+            "roles": ["1439646749550575636", "1439648201173897357"],
+            "nick": "ProPlayer (Алексей)", "joined_at": "2025-11-16T12:00:00.000000+00:00",
+        },
+    },
+}
+
+
+def bench(func, payload):
+    """Среднее время одного вызова в микросекундах"""
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(payload)
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+
+def compressed_frames(event):
+    """Кадры zlib-stream, как их присылает gateway (у каждого свой номер события)"""
+    compressor = zlib.compressobj()
+    frames = []
+    for seq in range(ITERATIONS):
+        raw = json.dumps(dict(event, s=seq), ensure_ascii=False).encode('utf-8')
+        frames.append(compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH))
+    return frames
+
+
+def bench_zlib(event):
+    """Распаковка потока кадров одним общим контекстом"""
+    frames = compressed_frames(event)
+    decompressor = zlib.decompressobj()
+    start = time.perf_counter()
+    for frame in frames:
+        decompressor.decompress(frame)
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000, len(frames[-1])
+
+
+def main():
+    print(f"{'событие':<22}{'байт':>7}{'сжато':>7}{'zlib':>9}{'json':>9}{'orjson':>9}{'выигрыш':>9}")
+    for name, event in SAMPLE_EVENTS.items():
+        raw_text = json.dumps(event, ensure_ascii=False)
+        raw_bytes = raw_text.encode('utf-8')
+        zlib_us, compressed_size = bench_zlib(event)
+        json_us = bench(json.loads, raw_text)
+        if orjson:
+            orjson_us = bench(orjson.loads, raw_text)
+            gain = f"{json_us / orjson_us:.1f}x"
+            orjson_cell = f"{orjson_us:.2f}"
+        else:
+            gain = orjson_cell = "-"
+        print(f"{name:<22}{len(raw_bytes):>7}{compressed_size:>7}{zlib_us:>9.2f}{json_us:>9.2f}{orjson_cell:>9}{gain:>9}")
+    print("\nВремя указано в мкс на одно событие.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Стоимость разбора ввода и сборки embed в обработчиках команд: до и после шаблонов.
+
+Запуск: python benchmarks/bench_templates.py
+
+«До» повторяет прежний код обработчиков: re.match со строкой шаблона и
+сборку discord.Embed с нуля. «После» — validation.py, готовые статичные
+embed из embed_templates и функции сборки embed с данными в расширениях.
+Перед замером проверяется, что оба варианта дают одинаковый embed.
+"""
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from cogs import vacation, verification  # noqa: E402  регистрируют свои шаблоны при импорте
+from embed_templates import embed_templates  # noqa: E402
+from validation import format_server_nickname, parse_vacation_duration, parse_verification_text  # noqa: E402
+
+ITERATIONS = 20000
+REPEATS = 5
+GUILD_NAME = "PUBG Клан"
+VERIFY_TEXT = "ProPlayer (Алексей)"
+MENTION = "<@389017023471517697>"
+NOW = datetime(2025, 11, 20, 18, 30).strftime('%d.%m.%Y %H:%M')
+
+# ---------- прежний код ----------
+
+OLD_PATTERN = r'^([a-zA-Z0-9_\-\.]+)\s+\(([а-яА-ЯёЁ\s]+)\)$'
+
+
+def old_parse(text):
+    match = re.match(OLD_PATTERN, text.strip())
+    if not match:
+        return None, None, 'format'
+    pubg_nickname = match.group(1)
+    real_name = match.group(2)
+    if len(pubg_nickname) < 3 or len(pubg_nickname) > 20:
+        return pubg_nickname, real_name, 'nickname_length'
+    if len(real_name) < 2 or len(real_name) > 15:
+        return pubg_nickname, real_name, 'name_length'
+    return pubg_nickname, real_name, None
+
+
+def old_verify():
+    pubg_nickname, real_name, _ = old_parse(VERIFY_TEXT)
+    new_nickname = f"{pubg_nickname} ({real_name})"
+    embed = discord.Embed(
+        title="✅ Верификация успешна!",
+        description=f"**Добро пожаловать, {real_name}!**\n\n"
+                    f"**Ваши данные:**\n"
+                    f"• 🎮 PUBG ник: `{pubg_nickname}`\n"
+                    f"• 👤 Ваше имя: `{real_name}`\n"
+                    f"• 📅 Верифицирован: `{NOW}`\n"
+                    f"• 📛 Требуемый ник: `{new_nickname}`\n\n"
+                    f"Теперь у вас есть доступ ко всем возможностям сервера! 🎉",
+        color=0x00ff00
+    )
+    embed.add_field(
+        name="📝 ВАЖНО: Измените серверный никнейм вручную",
+        value=f"**Инструкция для изменения никнейма в личном профиле:**\n\n"
+              f"1. **Нажмите на название сервера** в левом верхнем углу\n"
+              f"2. Выберите **'Профили'** → **'Личные профили сервера'**\n"
+              f"3. Найдите сервер **'{GUILD_NAME}'**\n"
+              f"4. В поле **'Никнейм на сервере'** введите:\n"
+              f"```{new_nickname}```\n"
+              f"5. **Сохраните изменения**\n\n"
+              f"*Это необходимо для идентификации в клане*",
+        inline=False
+    )
+    dm_embed = discord.Embed(
+        title=f"📝 Инструкция по изменению ника на сервере {GUILD_NAME}",
+        description=f"**Пожалуйста, установите ваш серверный никнейм:**\n```{new_nickname}```\n\n"
+                    f"**Как это сделать:**\n"
+                    f"1. Нажмите на **название сервера** вверху слева\n"
+                    f"2. Выберите **'Профили'** → **'Личные профили сервера'**\n"
+                    f"3. Найдите сервер **'{GUILD_NAME}'**\n"
+                    f"4. В поле **'Никнейм на сервере'** введите:\n```{new_nickname}```\n"
+                    f"5. Нажмите **'Сохранить'**\n\n"
+                    f"После этого ваш ник будет отображаться как `{new_nickname}`",
+        color=0x3498db
+    )
+    return embed, dm_embed
+
+
+def old_verify_error():
+    old_parse("Player Алексей")
+    return discord.Embed(
+        title="❌ Неверный формат",
+        description="**Правильный формат:** `никнейм (имя)`\n\n"
+                    "**Пример:** `!verify PlayerName (Алексей)`\n\n"
+                    "**Ошибки:**\n"
+                    "• Используйте английские буквы для ника\n"
+                    "• Используйте русские буквы для имени\n"
+                    "• Не забудьте скобки вокруг имени",
+        color=0xff0000
+    )
+
+
+def old_verification_help():
+    return discord.Embed(
+        title="🔐 ВЕРИФИКАЦИЯ ИГРОКА",
+        description="**Для доступа к серверу необходимо пройти верификацию!**\n\n"
+                    "**Команда:** `!verify <никнейм> (<имя>)`\n\n"
+                    "**Примеры:**\n"
+                    "• `!verify ProPlayer (Алексей)`\n"
+                    "• `!verify SniperWolf (Мария)`\n"
+                    "• `!verify Top_Fragger (Иван)`\n\n"
+                    "**Правила:**\n"
+                    "• Никнейм: английские буквы, цифры, символы _-.\n"
+                    "• Имя: только русские буквы в скобках\n"
+                    "• Скобки вокруг имени обязательны!\n\n"
+                    "**После верификации:**\n"
+                    "• Вы получите специальную роль\n"
+                    "• Получите подробную инструкцию по изменению ника\n"
+                    "• Откроется доступ ко всем разделам сервера",
+        color=0x3498db
+    )
+
+
+def old_vacation():
+    duration_lower = "неделя"
+    if duration_lower in ['3д', '3дня', '3 дня', '3 дня']:
+        time_delta, display_duration = timedelta(days=3), "1-3 дня"
+    elif duration_lower in ['неделя', '7д', '7дней']:
+        time_delta, display_duration = timedelta(weeks=1), "неделю"
+    else:
+        time_delta, display_duration = timedelta(weeks=2), "2 недели"
+    end_date = datetime(2025, 11, 20, 18, 30) + time_delta
+    admin_embed = discord.Embed(title="🏖️ Новая заявка на отпуск", color=0x00ff00)
+    admin_embed.add_field(name="👤 Сотрудник", value=MENTION, inline=True)
+    admin_embed.add_field(name="⏱️ Длительность", value=display_duration, inline=True)
+    admin_embed.add_field(name="📅 Дата окончания", value=end_date.strftime("%d.%m.%Y %H:%M"), inline=True)
+    embed = discord.Embed(
+        title="🎉 Заявка на отпуск принята!",
+        description=f"**{MENTION}, вы получили роль 🏖️ В отпуске!**\n\n"
+                    f"**📅 Период отпуска:** {display_duration}\n"
+                    f"**⏰ Дата окончания:** {end_date.strftime('%d.%m.%Y в %H:%M')}\n\n"
+                    f"Для досрочного возвращения используйте команду `!вернулся`\n"
+                    f"**Хорошего отдыха! 🌴☀️**",
+        color=0x00ff00
+    )
+    return admin_embed, embed
+
+# ---------- новый код ----------
+
+
+def new_verify():
+    pubg_nickname, real_name, _ = parse_verification_text(VERIFY_TEXT)
+    new_nickname = format_server_nickname(pubg_nickname, real_name)
+    embed = verification.build_verify_success_embed(real_name, pubg_nickname, NOW, new_nickname, GUILD_NAME)
+    dm_embed = verification.build_nickname_dm_embed(GUILD_NAME, new_nickname)
+    return embed, dm_embed
+
+
+def new_verify_error():
+    parse_verification_text("Player Алексей")
+    return embed_templates.get("verify.format")
+
+
+def new_verification_help():
+    return embed_templates.get("verification_help")
+
+
+def new_vacation():
+    time_delta, display_duration = parse_vacation_duration("неделя")
+    end_date = datetime(2025, 11, 20, 18, 30) + time_delta
+    admin_embed = vacation.build_admin_notice_embed(MENTION, display_duration, end_date.strftime("%d.%m.%Y %H:%M"))
+    embed = vacation.build_vacation_accepted_embed(MENTION, display_duration, end_date.strftime('%d.%m.%Y в %H:%M'))
+    return admin_embed, embed
+
+
+CASES = [
+    ("!verify (успех)", old_verify, new_verify),
+    ("!verify (ошибка формата)", old_verify_error, new_verify_error),
+    ("!верификация", old_verification_help, new_verification_help),
+    ("!отпуск", old_vacation, new_vacation),
+]
+
+
+def as_dicts(result):
+    embeds = result if isinstance(result, tuple) else (result,)
+    return [embed.to_dict() for embed in embeds]
+
+
+def bench(func):
+    """Время одного вызова в микросекундах, лучшее из нескольких прогонов"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / ITERATIONS * 1_000_000
+
+
+def main():
+    print(f"{'команда':<28}{'до':>9}{'после':>9}{'выигрыш':>9}")
+    for name, old, new in CASES:
+        assert as_dicts(old()) == as_dicts(new()), f"{name}: embed отличается"
+        old_us = bench(old)
+        new_us = bench(new)
+        print(f"{name:<28}{old_us:>9.2f}{new_us:>9.2f}{old_us / new_us:>8.1f}x")
+    print("\nВремя указано в мкс на вызов обработчика (только разбор ввода и сборка embed).")
+
+
+if __name__ == "__main__":
+    main()
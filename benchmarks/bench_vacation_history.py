@@ -0,0 +1,94 @@
+"""Запросы к истории отпусков на многолетней истории: индекс с границей длительности против полного просмотра.
+
+Запуск: python benchmarks/bench_vacation_history.py
+
+История: 300 участников, у каждого отпуск раз в месяц-два за 10 лет.
+«Полный просмотр» — тот же запрос без нижней границы start_at, SQLite
+проходит все записи сервера. Перед замером проверяется, что ответы совпадают.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vacation_history import VacationHistory  # noqa: E402
+
+GUILD_ID = 1
+MEMBERS = 300
+YEARS = 10
+DAY = 86400
+REPEATS = 200
+DURATIONS = (3 * DAY, 7 * DAY, 14 * DAY)
+
+FULL_SCAN = """
+SELECT user_id, start_at, end_at, duration FROM vacation_history NOT INDEXED
+WHERE guild_id = ? AND start_at < ? AND end_at > ?
+ORDER BY start_at
+"""
+
+
+def fill(history):
+    random.seed(0)
+    rows = []
+    for user_id in range(MEMBERS):
+        moment = random.randint(0, 30) * DAY
+        while moment < YEARS * 365 * DAY:
+            length = random.choice(DURATIONS)
+            rows.append((GUILD_ID, user_id, moment, moment + length, "неделю"))
+            moment += length + random.randint(30, 60) * DAY
+    connection = history.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO vacation_history (guild_id, user_id, start_at, end_at, duration) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    connection.close()
+    history.load()
+    return len(rows)
+
+
+def bench(func):
+    """Время одного запроса в микросекундах, лучшее из нескольких прогонов"""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / REPEATS * 1_000_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        history = VacationHistory(os.path.join(directory, 'history.db'))
+        total = fill(history)
+        connection = history.connect()
+
+        window_start = (YEARS * 365 - 100) * DAY
+        window_end = window_start + 7 * DAY
+
+        def indexed():
+            return connection.execute(
+                "SELECT user_id, start_at, end_at, duration FROM vacation_history "
+                "WHERE guild_id = ? AND start_at BETWEEN ? AND ? AND end_at > ? ORDER BY start_at",
+                (GUILD_ID, window_start - history.max_duration, window_end - 1, window_start)
+            ).fetchall()
+
+        def full_scan():
+            return connection.execute(FULL_SCAN, (GUILD_ID, window_end, window_start)).fetchall()
+
+        found = indexed()
+        assert found == full_scan() == history.overlapping(GUILD_ID, window_start, window_end)
+
+        print(f"Записей в истории: {total}, найдено за неделю: {len(found)}")
+        print(f"{'запрос':<24}{'мкс':>10}")
+        print(f"{'полный просмотр':<24}{bench(full_scan):>10.1f}")
+        print(f"{'индекс + граница':<24}{bench(indexed):>10.1f}")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
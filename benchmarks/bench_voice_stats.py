@@ -0,0 +1,66 @@
+"""Накладные расходы трекера голосовой активности.
+
+Запуск: python benchmarks/bench_voice_stats.py
+
+Меряет стоимость одного события on_voice_state_update для трекера,
+сброс накопленного в SQLite и запросы статистики.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_stats import VoiceSessionTracker  # noqa: E402
+
+GUILD_ID = 1439572595258425344
+USERS = 5000
+EVENTS = 200000
+CHANNEL_TYPES = ["сквад", "дуо", "соло", "группа", "митинг", "кино", "другое"]
+
+
+def main():
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as directory:
+        tracker = VoiceSessionTracker(os.path.join(directory, "voice_stats.db"))
+        tracker.load()
+
+        # Заранее готовим события, чтобы мерить только трекер
+        now = int(time.time()) - EVENTS
+        current = {}
+        events = []
+        for step in range(EVENTS):
+            user_id = random.randrange(USERS)
+            before = current.get(user_id)
+            after = None if before and random.random() < 0.4 else random.choice(CHANNEL_TYPES)
+            current[user_id] = after
+            events.append((user_id, before, after, now + step))
+
+        start = time.perf_counter()
+        for user_id, before, after, moment in events:
+            tracker.on_voice_event(GUILD_ID, user_id, before, after, moment)
+        event_us = (time.perf_counter() - start) / EVENTS * 1_000_000
+
+        start = time.perf_counter()
+        batch = tracker.take_pending(now + EVENTS)
+        take_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        tracker.write_batch(batch)
+        write_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            tracker.top_users(GUILD_ID, 'week')
+            tracker.user_totals(GUILD_ID, random.randrange(USERS), 'day')
+        query_us = (time.perf_counter() - start) / 10000 * 1_000_000
+
+    print(f"событие голосового канала: {event_us:.2f} мкс ({EVENTS} событий, {USERS} участников)")
+    print(f"подготовка сброса: {take_ms:.1f} мс, запись {len(batch)} строк в SQLite: {write_ms:.1f} мс")
+    print(f"запрос топа + статистики участника: {query_us:.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Расширение статистики голосовой активности: учет сессий и команда !статистика."""
+import asyncio
+import os
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+import core
+from core import (
+    active_temp_channels,
+    begin_command,
+    command_cooldown,
+    guild_config,
+    safe_send_message,
+    take_handover,
+    voice_member_ids,
+)
+from voice_stats import VoiceSessionTracker
+
+VOICE_STATS_DB = os.getenv('VOICE_STATS_DB', 'voice_stats.db')
+VOICE_STATS_FLUSH_MINUTES = 5
+VOICE_STATS_PERIODS = {'день': 'day', 'неделя': 'week'}
+
+def load_voice_tracker():
+    """Создает трекер и подгружает суммы за текущие день и неделю"""
+    tracker = VoiceSessionTracker(VOICE_STATS_DB)
+    tracker.load()
+    return tracker
+
+def get_voice_channel_type(channel):
+    """Тип голосового канала для статистики; триггер-каналы и AFK не учитываются"""
+    if channel is None or channel.id in guild_config(channel.guild.id).trigger_types or channel == channel.guild.afk_channel:
+        return None
+
+    temp_channel = active_temp_channels.get(channel.id)
+    if temp_channel:
+        return temp_channel.channel_type
+    return "другое"
+
+def seed_voice_sessions(tracker, guild):
+    """Открывает сессии для тех, кто уже сидит в голосовых каналах при запуске"""
+    for channel in guild.voice_channels:
+        channel_type = get_voice_channel_type(channel)
+        if channel_type is None:
+            continue
+        for user_id in voice_member_ids(channel):
+            # Без полного кэша участника может не быть — тогда считаем, что это не бот
+            member = guild.get_member(user_id)
+            if not (member and member.bot):
+                tracker.start_session(guild.id, user_id, channel_type)
+
+def format_duration(seconds):
+    """Форматирует секунды как «3 ч 15 мин»"""
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours} ч {minutes} мин" if hours else f"{minutes} мин"
+
+class Activity(commands.Cog):
+    """Статистика голосовой активности"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # Открытые сессии и несброшенные секунды переживают перезагрузку расширения
+        self.tracker = take_handover('activity.tracker', load_voice_tracker)
+
+    async def cog_load(self):
+        self.voice_stats_flush_task.start()
+
+    async def cog_unload(self):
+        self.voice_stats_flush_task.cancel()
+        core.handover['activity.tracker'] = self.tracker
+
+    async def shutdown(self):
+        """Закрывает открытые сессии и сбрасывает накопленное в базу перед остановкой"""
+        self.voice_stats_flush_task.cancel()
+        batch = self.tracker.take_pending()
+        await asyncio.to_thread(self.tracker.write_batch, batch)
+        return f"сброшено строк статистики: {len(batch)}"
+
+    async def reconcile_guild(self, guild, state):
+        """Открывает сессии для участников, уже сидящих в голосовых каналах"""
+        seed_voice_sessions(self.tracker, guild)
+        return f"голосовых сессий {sum(1 for key in self.tracker.sessions if key[0] == guild.id)}"
+
+    @tasks.loop(minutes=VOICE_STATS_FLUSH_MINUTES)
+    async def voice_stats_flush_task(self):
+        """Сбрасывает накопленную статистику в SQLite одной транзакцией"""
+        batch = self.tracker.take_pending()
+        try:
+            await asyncio.to_thread(self.tracker.write_batch, batch)
+        except Exception as e:
+            print(f"❌ Ошибка записи статистики голосовых каналов: {e}")
+            self.tracker.restore_pending(batch)
+
+    @voice_stats_flush_task.before_loop
+    async def before_voice_stats_flush(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Передает переходы между голосовыми каналами в трекер"""
+        try:
+            if before.channel != after.channel and not member.bot:
+                self.tracker.on_voice_event(
+                    member.guild.id, member.id,
+                    get_voice_channel_type(before.channel), get_voice_channel_type(after.channel)
+                )
+        except Exception as e:
+            print(f"❌ Ошибка учета голосовой активности: {e}")
+
+    @commands.hybrid_command(name='статистика')
+    @app_commands.describe(period="Период: день или неделя", member="Участник для подробной статистики")
+    async def voice_stats_command(self, ctx, period: str = 'неделя', member: discord.User = None):
+        """Статистика времени в голосовых каналах"""
+        if not await command_cooldown(ctx, 'voice_stats', 5):
+            return
+
+        await begin_command(ctx)
+
+        period_key = VOICE_STATS_PERIODS.get(period.lower())
+        if not period_key:
+            await safe_send_message(ctx, "❌ Период должен быть: день или неделя.", delete_after=10)
+            return
+
+        if member:
+            totals = self.tracker.user_totals(ctx.guild.id, member.id, period_key)
+            lines = [
+                f"• **{channel_type}:** {format_duration(seconds)}"
+                for channel_type, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+            ]
+            embed = discord.Embed(
+                title=f"🎧 Активность {member.display_name} за {period.lower()}",
+                description=f"**Всего:** {format_duration(sum(totals.values()))}\n\n" + "\n".join(lines)
+                            if lines else "*Нет активности за этот период*",
+                color=0x3498db
+            )
+        else:
+            top = self.tracker.top_users(ctx.guild.id, period_key)
+            lines = [
+                f"**{place}.** <@{user_id}> — {format_duration(seconds)}"
+                for place, (seconds, user_id) in enumerate(top, 1)
+            ]
+            embed = discord.Embed(
+                title=f"🏆 Самые активные за {period.lower()}",
+                description="\n".join(lines) if lines else "*Нет активности за этот период*",
+                color=0x3498db
+            )
+
+        embed.set_footer(text=f"Обновляется раз в {VOICE_STATS_FLUSH_MINUTES} минут")
+        await safe_send_message(ctx, embed=embed, delete_after=60)
+
+
+async def setup(bot):
+    await bot.add_cog(Activity(bot))
@@ -0,0 +1,371 @@
+"""Расширение администрирования: профилирование, отчет о памяти, перезагрузка расширений и настроек."""
+import asyncio
+import cProfile
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+import core
+from core import (
+    GUILD_CONFIG_FILE,
+    active_searches,
+    active_temp_channels,
+    active_vacations,
+    begin_command,
+    breakers,
+    channel_locks,
+    cooldowns,
+    get_rss_mb,
+    guild_config,
+    member_locks,
+    member_lru,
+    reload_guild_configs,
+    safe_send_message,
+    verified_players,
+)
+
+# ==================== ПРОФИЛИРОВАНИЕ ====================
+
+PROFILE_DIR = os.getenv('BOT_PROFILE_DIR', 'profiles')
+PROFILER_MAX_SECONDS = 300
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+profiler_running = False
+
+def collect_qualnames(bot):
+    """Сопоставляет (файл, строка) полным именам обработчиков бота"""
+    qualnames = {}
+    
+    def add(func):
+        if isinstance(func, commands.Command):
+            func = func.callback
+        elif isinstance(func, tasks.Loop):
+            func = func.coro
+        code = getattr(func, '__code__', None)
+        if code:
+            qualnames[(code.co_filename, code.co_firstlineno)] = code.co_qualname
+    
+    # Код бота разнесен по расширениям, поэтому обходим все их модули
+    modules = [core, sys.modules.get('__main__')] + list(bot.extensions.values())
+    for module in modules:
+        if module is None:
+            continue
+        for obj in list(vars(module).values()):
+            if isinstance(obj, type) and obj.__module__ == module.__name__:
+                for attr in vars(obj).values():
+                    add(attr)
+            else:
+                add(obj)
+    
+    return qualnames
+
+def is_project_file(filename):
+    """Относится ли файл к коду бота, а не к библиотекам или встроенным функциям"""
+    if filename.startswith(('~', '<')) or 'site-packages' in filename:
+        return False
+    return os.path.abspath(filename).startswith(PROJECT_DIR + os.sep)
+
+def format_profile_rows(rows, limit=1000):
+    """Собирает строки отчета, не выходя за лимит поля embed"""
+    text = ""
+    for row in rows:
+        if len(text) + len(row) + 1 > limit:
+            break
+        text += row + "\n"
+    return text or "*Нет данных*"
+
+def build_profile_embed(bot, profiler, seconds, top, path):
+    """Сводка профиля: обработчики бота по суммарному времени и самые тяжелые функции процесса"""
+    stats = pstats.Stats(profiler).stats
+    qualnames = collect_qualnames(bot)
+    
+    # Время корутины считается только пока она выполняется, ожидание в await не учитывается
+    own_rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.items():
+        if is_project_file(filename):
+            qualname = qualnames.get((filename, line), name)
+            own_rows.append((cumtime, calls, qualname))
+    own_rows.sort(reverse=True)
+    
+    process_rows = sorted(
+        ((tottime, calls, f"{os.path.basename(filename)}:{name}")
+         for (filename, line, name), (_, calls, tottime, _, _) in stats.items()),
+        reverse=True
+    )
+    total_time = sum(row[0] for row in process_rows)
+    
+    embed = discord.Embed(
+        title="🔬 Результаты профилирования",
+        description=f"**Длительность:** {seconds} сек\n"
+                   f"**Процессорное время:** {total_time * 1000:.0f} мс "
+                   f"({total_time / seconds * 100:.1f}% одного ядра)\n"
+                   f"**Файл профиля:** `{path}`",
+        color=0x3498db,
+        timestamp=datetime.now()
+    )
+    embed.add_field(
+        name="🤖 Обработчики бота (суммарно)",
+        value=format_profile_rows(
+            f"`{cumtime * 1000:8.1f} мс` {calls}× {qualname}" for cumtime, calls, qualname in own_rows[:top]
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="⚙️ Весь процесс (собственное время)",
+        value=format_profile_rows(
+            f"`{tottime * 1000:8.1f} мс` {calls}× {name}" for tottime, calls, name in process_rows[:top]
+        ),
+        inline=False
+    )
+    return embed
+
+# ==================== ОТЧЕТ О ПАМЯТИ ====================
+
+# BOT_TRACEMALLOC=1 включает трассировку выделений памяти с момента запуска
+if os.getenv('BOT_TRACEMALLOC') == '1' and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+def deep_sizeof(obj, seen=None):
+    """Приблизительный размер объекта вместе с вложенными контейнерами и записями"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(type(obj), '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in type(obj).__slots__ if hasattr(obj, slot))
+    return size
+
+def format_bytes(size):
+    """Форматирует размер в Б/КБ/МБ"""
+    for unit in ("Б", "КБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} МБ"
+
+
+# ==================== ПЕРЕЗАГРУЗКА РАСШИРЕНИЙ ====================
+
+def extension_names(bot):
+    """Короткие имена загруженных расширений: verification, vacation, ..."""
+    return [name.rsplit('.', 1)[-1] for name in bot.extensions]
+
+class Admin(commands.Cog):
+    """Команды администраторов"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @commands.hybrid_command(name='профилировать')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(seconds="Длительность профилирования в секундах", top="Сколько строк показать")
+    async def profile_command(self, ctx, seconds: int = 30, top: int = 15):
+        """Профилирует работающего бота N секунд (только для администраторов)"""
+        global profiler_running
+        await begin_command(ctx, defer=True)
+        
+        if profiler_running:
+            await safe_send_message(ctx, "❌ Профилирование уже запущено.", delete_after=10)
+            return
+        
+        seconds = max(1, min(seconds, PROFILER_MAX_SECONDS))
+        top = max(1, min(top, 25))
+        profiler_running = True
+        # По умолчанию cProfile считает время по часам, включая ожидание; нужно процессорное
+        profiler = cProfile.Profile(time.process_time)
+        
+        try:
+            await safe_send_message(ctx, f"🔬 Профилирование запущено на {seconds} сек...", delete_after=seconds)
+            profiler.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+            profiler_running = False
+        
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+            profiler.dump_stats(path)
+            embed = build_profile_embed(ctx.bot, profiler, seconds, top, path)
+        except Exception as e:
+            print(f"❌ Ошибка при сохранении профиля: {e}")
+            await safe_send_message(ctx, "❌ Не удалось сохранить профиль.", delete_after=15)
+            return
+        
+        admin_channel = ctx.guild.get_channel(guild_config(ctx.guild.id).vacation_admin_channel_id)
+        if admin_channel:
+            try:
+                await admin_channel.send(embed=embed)
+                await safe_send_message(ctx, f"✅ Отчет отправлен в {admin_channel.mention}", delete_after=15)
+                return
+            except Exception as e:
+                print(f"⚠️ Не удалось отправить отчет в админский канал: {e}")
+        
+        await safe_send_message(ctx, embed=embed)
+        print(f"🔬 Профиль сохранен: {path}")
+
+    @commands.hybrid_command(name='память')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    async def memory_report_command(self, ctx):
+        """Отчет о памяти реестров бота (только для администраторов)"""
+        await begin_command(ctx, defer=True)
+        
+        registries = {
+            "Временные каналы": active_temp_channels,
+            "Поиски": active_searches,
+            "Отпуска": active_vacations,
+            "Верифицированные": verified_players,
+            "Кулдауны": cooldowns,
+        }
+        activity = ctx.bot.get_cog('Activity')
+        if activity:
+            registries.update({
+                "Голосовые сессии": activity.tracker.sessions,
+                "Статистика (не сброшено)": activity.tracker.pending,
+                "Статистика (день/неделя)": activity.tracker.totals,
+            })
+        
+        lines = []
+        total = 0
+        for name, registry in registries.items():
+            size = deep_sizeof(registry)
+            total += size
+            lines.append(f"• **{name}:** {len(registry)} записей, ~{format_bytes(size)}")
+        
+        # Участники из LRU ссылаются на объекты сервера, поэтому их только считаем
+        lines.append(f"• **LRU участников:** {len(member_lru.members)}/{member_lru.max_size}")
+        
+        # Число блокировок фиксировано, растут только счетчики
+        for name, locks in (("участников", member_locks), ("каналов", channel_locks)):
+            lines.append(f"• **Блокировки {name}:** {len(locks.locks)} полос, "
+                         f"ожиданий {locks.contended}, таймаутов {locks.timeouts}")
+        
+        open_routes = sorted({route for (route, _), breaker in breakers.items() if breaker.opened_at is not None})
+        lines.append(f"• **Маршруты API:** {len(breakers)}, отключены: {', '.join(open_routes) or 'нет'}")
+        
+        embed = discord.Embed(
+            title="🧠 Память бота",
+            description="\n".join(lines) + f"\n\n**Итого по реестрам:** ~{format_bytes(total)}\n"
+                                          f"**RSS процесса:** {get_rss_mb():.1f} МБ",
+            color=0x3498db,
+            timestamp=datetime.now()
+        )
+        
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top_stats = tracemalloc.take_snapshot().statistics('filename')[:5]
+            embed.add_field(
+                name=f"🔎 tracemalloc: {format_bytes(current)} (пик {format_bytes(peak)})",
+                value="\n".join(
+                    f"`{format_bytes(stat.size):>9}` {os.path.basename(stat.traceback[0].filename)}" for stat in top_stats
+                ) or "*Нет данных*",
+                inline=False
+            )
+        
+        await safe_send_message(ctx, embed=embed)
+
+    @commands.hybrid_command(name='перезагрузить')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(name="Имя расширения или all", sync="Пересинхронизировать слэш-команды сервера")
+    async def reload_command(self, ctx, name: str = 'all', sync: bool = False):
+        """Перезагружает расширения без перезапуска бота (только для администраторов)"""
+        await begin_command(ctx, defer=True)
+        
+        available = extension_names(ctx.bot)
+        names = available if name.lower() == 'all' else [name.lower()]
+        unknown = [extension for extension in names if extension not in available]
+        if unknown:
+            await safe_send_message(
+                ctx, f"❌ Неизвестное расширение: {', '.join(unknown)}. Доступны: {', '.join(available)}",
+                delete_after=15
+            )
+            return
+        
+        # Реестры лежат в core и не перезагружаются, поэтому состояние сохраняется
+        results = []
+        for extension in names:
+            try:
+                await ctx.bot.reload_extension(f"cogs.{extension}")
+                results.append(f"✅ {extension}")
+                print(f"🔄 Расширение перезагружено: {extension}")
+            except commands.ExtensionError as e:
+                results.append(f"❌ {extension}: {e.__cause__ or e}")
+                print(f"❌ Ошибка перезагрузки расширения {extension}: {e}")
+        
+        if sync and ctx.guild:
+            try:
+                ctx.bot.tree.copy_global_to(guild=ctx.guild)
+                synced = await ctx.bot.tree.sync(guild=ctx.guild)
+                results.append(f"🔁 Слэш-команд синхронизировано: {len(synced)}")
+            except Exception as e:
+                results.append(f"⚠️ Синхронизация слэш-команд не удалась: {e}")
+        
+        await safe_send_message(ctx, "\n".join(results), delete_after=30)
+
+    @commands.hybrid_command(name='настройки')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(reload="Перечитать файл настроек сейчас, не дожидаясь проверки")
+    async def guild_config_command(self, ctx, reload: bool = False):
+        """Действующие настройки сервера (только для администраторов)"""
+        # Долго только перечитывание файла
+        await begin_command(ctx, defer=reload)
+        
+        if reload:
+            try:
+                await reload_guild_configs(force=True)
+            except Exception as e:
+                await safe_send_message(ctx, f"❌ Ошибка в файле настроек, остаются прежние: {e}", delete_after=30)
+                return
+        
+        # Реестр заменяется целиком, поэтому читаем его через модуль
+        registry = core.guild_configs
+        config = registry.for_guild(ctx.guild.id)
+        if registry.signature is None:
+            source = "встроенные (файла нет)"
+        elif ctx.guild.id in registry.guilds:
+            source = f"{GUILD_CONFIG_FILE}, раздел сервера"
+        else:
+            source = f"{GUILD_CONFIG_FILE}, default"
+        
+        def mention(channel_id, prefix='#'):
+            return f"<{prefix}{channel_id}>" if channel_id else "не задан"
+        
+        triggers = "\n".join(
+            f"• {channel_type}: <#{channel_id}> → `{config.channel_templates[channel_type].name}`"
+            for channel_type, channel_id in config.trigger_channels.items()
+        )
+        embed = discord.Embed(title="🔧 Настройки сервера", description=f"**Источник:** {source}", color=0x3498db)
+        embed.add_field(name="🔊 Триггер-каналы", value=triggers or "*нет*", inline=False)
+        embed.add_field(
+            name="📌 Каналы и роли",
+            value=f"• Поиск игроков: {mention(config.player_search_channel_id)}\n"
+                  f"• Заявки на отпуск: {mention(config.vacation_request_channel_id)}\n"
+                  f"• Админский канал: {mention(config.vacation_admin_channel_id)}\n"
+                  f"• Роль отпуска: {mention(config.vacation_role_id, '@&')}\n"
+                  f"• Канал верификации: {mention(config.verification_channel_id)}\n"
+                  f"• Роль верификации: {mention(config.verified_role_id, '@&')}",
+            inline=False
+        )
+        embed.set_footer(text=f"Серверов в файле: {len(registry.guilds)}")
+        await safe_send_message(ctx, embed=embed, delete_after=120)
+
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
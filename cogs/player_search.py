@@ -0,0 +1,635 @@
+"""Расширение поиска игроков: !i / !поиск и автоматическое обновление объявлений."""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+from discord.ui import Button, View
+
+from core import (
+    BUSY_MESSAGE,
+    LOCK_TIMEOUT_SECONDS,
+    active_searches,
+    active_temp_channels,
+    begin_command,
+    channel_locks,
+    command_cooldown,
+    guild_config,
+    load_record,
+    member_locks,
+    resolve_members,
+    safe_delete_message,
+    safe_send_message,
+    save_state,
+    search_boards,
+    voice_member_ids,
+)
+from records import SearchBoardRecord, SearchRecord
+
+# board — все поиски на одной доске в канале поиска вместо сообщения на каждый поиск
+SEARCH_BOARD_MODE = os.getenv('SEARCH_BOARD_MODE', 'messages') == 'board'
+SEARCH_BOARD_DEBOUNCE_SECONDS = 3
+SEARCH_BOARD_PAGE_SIZE = 20  # не больше 25 — предел вариантов в меню выбора
+SEARCH_BOARD_MAX_MESSAGES = 3
+SEARCH_TEXT_PREVIEW = 100
+
+def join_error(client, record, user):
+    """Почему пользователь не может откликнуться на поиск, или None"""
+    if not record:
+        return "❌ Поиск уже завершен!"
+    if user.id == record.author_id:
+        return "❌ Вы не можете присоединиться к своему поиску!"
+    if user.id in record.joined_users:
+        return "❌ Вы уже присоединились!"
+    if not client.get_channel(record.voice_channel_id):
+        return "❌ Канал не найден!"
+    return None
+
+class PlayerSearchView(View):
+    """Кнопки поиска; сами данные поиска лежат в active_searches"""
+    
+    def __init__(self, author_id):
+        super().__init__(timeout=3600)
+        self.author_id = author_id
+
+    @discord.ui.button(label="🎮 Присоединиться", style=discord.ButtonStyle.success)
+    async def join_search(self, interaction: discord.Interaction, button: Button):
+        try:
+            user = interaction.user
+            record = active_searches.get(self.author_id)
+            
+            error = join_error(interaction.client, record, user)
+            if error:
+                await interaction.response.send_message(error, ephemeral=True)
+                return
+            
+            record.joined_users.add(user.id)
+            record.last_update = int(time.time())
+            save_state()
+            
+            # Обновляем сообщение
+            await update_search_message(interaction.client, record)
+            await interaction.response.defer()
+                    
+        except Exception as e:
+            print(f"❌ Ошибка в join_search: {e}")
+
+    @discord.ui.button(label="🚪 Покинуть", style=discord.ButtonStyle.danger)
+    async def leave_search(self, interaction: discord.Interaction, button: Button):
+        try:
+            user = interaction.user
+            record = active_searches.get(self.author_id)
+            
+            if not record or user.id not in record.joined_users:
+                await interaction.response.send_message("❌ Вы не присоединялись!", ephemeral=True)
+                return
+            
+            record.joined_users.remove(user.id)
+            record.last_update = int(time.time())
+            save_state()
+            
+            await update_search_message(interaction.client, record)
+            await interaction.response.defer()
+            
+        except Exception as e:
+            print(f"❌ Ошибка в leave_search: {e}")
+
+    @discord.ui.button(label="❌ Завершить", style=discord.ButtonStyle.secondary)
+    async def cancel_search(self, interaction: discord.Interaction, button: Button):
+        try:
+            user = interaction.user
+            
+            if user.id != self.author_id:
+                await interaction.response.send_message("❌ Только автор может завершить поиск!", ephemeral=True)
+                return
+            
+            await remove_search(interaction.client, self.author_id)
+            self.stop()
+            await interaction.response.defer()
+                
+        except Exception as e:
+            print(f"❌ Ошибка в cancel_search: {e}")
+
+# ==================== ДОСКА ПОИСКА ====================
+
+board_render_tasks = {}
+board_rendered = {}
+
+class SearchBoardView(View):
+    """Меню выбора поиска и кнопки одной страницы доски"""
+    
+    def __init__(self, options):
+        super().__init__(timeout=None)
+        if options:
+            # Постоянные custom_id: новая версия страницы заменяет обработчики прежней, а не копит их
+            select = discord.ui.Select(
+                placeholder="🎮 Присоединиться к поиску...", options=options, row=0, custom_id="search_board:join"
+            )
+            select.callback = self.join_selected
+            self.add_item(select)
+
+    async def join_selected(self, interaction: discord.Interaction):
+        try:
+            user = interaction.user
+            author_id = int(interaction.data['values'][0])
+            record = active_searches.get(author_id)
+            
+            error = join_error(interaction.client, record, user)
+            if error:
+                await interaction.response.send_message(error, ephemeral=True)
+                return
+            
+            record.joined_users.add(user.id)
+            record.last_update = int(time.time())
+            save_state()
+            
+            await interaction.response.send_message(f"✅ Вы откликнулись на поиск <@{author_id}>", ephemeral=True)
+            schedule_board_render(interaction.client, record.guild_id)
+            
+        except Exception as e:
+            print(f"❌ Ошибка в join_selected: {e}")
+
+    @discord.ui.button(label="🚪 Покинуть", style=discord.ButtonStyle.danger, row=1, custom_id="search_board:leave")
+    async def leave_searches(self, interaction: discord.Interaction, button: Button):
+        try:
+            user = interaction.user
+            left = 0
+            for record in active_searches.values():
+                if record.guild_id == interaction.guild_id and user.id in record.joined_users:
+                    record.joined_users.discard(user.id)
+                    record.last_update = int(time.time())
+                    left += 1
+            
+            if not left:
+                await interaction.response.send_message("❌ Вы не присоединялись!", ephemeral=True)
+                return
+            
+            save_state()
+            await interaction.response.send_message(f"✅ Отклик снят с поисков: {left}", ephemeral=True)
+            schedule_board_render(interaction.client, interaction.guild_id)
+            
+        except Exception as e:
+            print(f"❌ Ошибка в leave_searches: {e}")
+
+    @discord.ui.button(label="❌ Завершить мой поиск", style=discord.ButtonStyle.secondary, row=1, custom_id="search_board:cancel")
+    async def cancel_own_search(self, interaction: discord.Interaction, button: Button):
+        try:
+            if interaction.user.id not in active_searches:
+                await interaction.response.send_message("❌ У вас нет активного поиска!", ephemeral=True)
+                return
+            
+            await remove_search(interaction.client, interaction.user.id)
+            await interaction.response.send_message("✅ Поиск завершен", ephemeral=True)
+            
+        except Exception as e:
+            print(f"❌ Ошибка в cancel_own_search: {e}")
+
+def preview_text(text, limit=SEARCH_TEXT_PREVIEW):
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def build_board_pages(guild, authors):
+    """Раскладывает поиски сервера по страницам: [(embeds, варианты меню)]; authors — участники по ID"""
+    # Группы идут в порядке шаблонов каналов, прочие каналы в конце
+    type_order = guild_config(guild.id).type_order
+    entries = []
+    for record in active_searches.values():
+        if record.guild_id != guild.id:
+            continue
+        voice_channel = guild.get_channel(record.voice_channel_id)
+        if not voice_channel:
+            continue
+        temp_channel = active_temp_channels.get(voice_channel.id)
+        channel_type = temp_channel.channel_type if temp_channel else "другое"
+        entries.append((type_order.get(channel_type, len(type_order)), record.last_update, channel_type, record, voice_channel))
+    entries.sort(key=lambda entry: entry[:2])
+    
+    capacity = SEARCH_BOARD_PAGE_SIZE * SEARCH_BOARD_MAX_MESSAGES
+    hidden = max(0, len(entries) - capacity)
+    entries = entries[:capacity]
+    
+    if not entries:
+        embed = discord.Embed(
+            title="🎯 ПОИСК ИГРОКОВ",
+            description="*Сейчас никто не ищет игроков.*\n\nСоздайте поиск командой `!i <описание>`, находясь в голосовом канале.",
+            color=0x3498db
+        )
+        return [([embed], [])]
+    
+    pages = []
+    for i in range(0, len(entries), SEARCH_BOARD_PAGE_SIZE):
+        groups = {}
+        options = []
+        for _, _, channel_type, record, voice_channel in entries[i:i + SEARCH_BOARD_PAGE_SIZE]:
+            max_players = voice_channel.user_limit if voice_channel.user_limit > 0 else "∞"
+            groups.setdefault(channel_type, []).append(
+                f"• <@{record.author_id}> → {voice_channel.mention} "
+                f"👥 {len(voice_member_ids(voice_channel))}/{max_players} · 🎮 {len(record.joined_users)}\n"
+                f"{preview_text(record.search_text)}"
+            )
+            author = authors.get(record.author_id)
+            options.append(discord.SelectOption(
+                label=preview_text(f"{author.display_name if author else record.author_id} · {voice_channel.name}", 100),
+                description=preview_text(record.search_text, 100),
+                value=str(record.author_id),
+            ))
+        
+        embeds = [
+            discord.Embed(title=f"🎯 {channel_type.upper()} ({len(lines)})", description="\n".join(lines), color=0x3498db)
+            for channel_type, lines in groups.items()
+        ]
+        pages.append((embeds, options))
+    
+    footer = "Выберите поиск в меню, чтобы откликнуться · Заходи быстрее💀"
+    if hidden:
+        footer = f"Не поместилось поисков: {hidden} · " + footer
+    pages[-1][0][-1].set_footer(text=footer)
+    return pages
+
+async def render_board(guild):
+    """Приводит сообщения доски в соответствие с поисками; неизмененные страницы не редактируются"""
+    channel = guild.get_channel(guild_config(guild.id).player_search_channel_id)
+    if not channel:
+        return
+    
+    try:
+        async with channel_locks.hold(guild.id, 'search_board', timeout=LOCK_TIMEOUT_SECONDS):
+            board = search_boards.get(guild.id)
+            if board is None or board.channel_id != channel.id:
+                board = search_boards[guild.id] = SearchBoardRecord(channel_id=channel.id)
+            
+            # Без полного кэша авторов подгружаем одним запросом, а не по одному
+            author_ids = [record.author_id for record in active_searches.values() if record.guild_id == guild.id]
+            pages = build_board_pages(guild, await resolve_members(guild, author_ids))
+            message_ids = []
+            for index, (embeds, options) in enumerate(pages):
+                signature = repr(([embed.to_dict() for embed in embeds], [(o.label, o.description, o.value) for o in options]))
+                message_id = board.message_ids[index] if index < len(board.message_ids) else None
+                
+                if message_id and board_rendered.get(message_id) == signature:
+                    message_ids.append(message_id)
+                    continue
+                
+                view = SearchBoardView(options)
+                try:
+                    if message_id:
+                        await channel.get_partial_message(message_id).edit(embeds=embeds, view=view)
+                    else:
+                        message_id = (await channel.send(embeds=embeds, view=view)).id
+                except discord.NotFound:
+                    # Страницу удалили вручную — публикуем заново
+                    message_id = (await channel.send(embeds=embeds, view=view)).id
+                
+                board_rendered[message_id] = signature
+                message_ids.append(message_id)
+            
+            # Лишние страницы, когда поисков стало меньше
+            for message_id in board.message_ids[len(pages):]:
+                board_rendered.pop(message_id, None)
+                await safe_delete_message(channel.get_partial_message(message_id))
+            
+            if message_ids != board.message_ids:
+                board.message_ids = message_ids
+                save_state()
+    except asyncio.TimeoutError:
+        # Доску сейчас перерисовывает другая задача; цикл проверки поисков запросит перерисовку снова
+        print(f"⚠️ Не дождались очереди на перерисовку доски поиска на {guild.name}")
+
+async def render_board_later(bot, guild_id):
+    # Изменения за время ожидания попадают в одну перерисовку
+    try:
+        await asyncio.sleep(SEARCH_BOARD_DEBOUNCE_SECONDS)
+    finally:
+        board_render_tasks.pop(guild_id, None)
+    
+    guild = bot.get_guild(guild_id)
+    if guild:
+        try:
+            await render_board(guild)
+        except Exception as e:
+            print(f"❌ Ошибка обновления доски поиска: {e}")
+
+def schedule_board_render(bot, guild_id):
+    """Запрашивает перерисовку доски; частые изменения сливаются в одну"""
+    if SEARCH_BOARD_MODE and guild_id not in board_render_tasks:
+        board_render_tasks[guild_id] = asyncio.create_task(render_board_later(bot, guild_id))
+
+async def remove_board(guild):
+    """Удаляет доску, когда режим доски выключен"""
+    board = search_boards.pop(guild.id, None)
+    if board:
+        channel = guild.get_channel(board.channel_id)
+        for message_id in board.message_ids if channel else ():
+            await safe_delete_message(channel.get_partial_message(message_id))
+        save_state()
+
+# ==================== СООБЩЕНИЯ ПОИСКА ====================
+
+def get_search_message(bot, record):
+    """Сообщение поиска без запроса к API"""
+    channel = bot.get_channel(record.channel_id)
+    return channel.get_partial_message(record.message_id) if channel else None
+
+async def update_search_message(bot, record):
+    """Обновляет сообщение поиска (кнопки остаются прежними)"""
+    try:
+        message = get_search_message(bot, record)
+        if message:
+            embed = await create_search_embed(bot, record)
+            await message.edit(embed=embed)
+    except Exception as e:
+        print(f"❌ Ошибка при обновлении сообщения поиска: {e}")
+
+async def create_search_embed(bot, record):
+    """Создает красивый embed для поиска с информацией о канале"""
+    voice_channel = bot.get_channel(record.voice_channel_id)
+    member_ids = voice_member_ids(voice_channel) if voice_channel else []
+    current_players = len(member_ids)
+    max_players = voice_channel.user_limit if voice_channel and voice_channel.user_limit > 0 else "∞"
+    
+    embed = discord.Embed(
+        title="🎯 ПОИСК ИГРОКОВ",
+        description=f"**<@{record.author_id}> ищет команду!**\n\n"
+                   f"**📝 Описание поиска:**\n{record.search_text}",
+        color=0x3498db,
+        timestamp=datetime.fromtimestamp(record.last_update)
+    )
+    
+    # Статус канала
+    embed.add_field(
+        name="🔊 ГОЛОСОВОЙ КАНАЛ",
+        value=f"**➥ {voice_channel.mention if voice_channel else '❌ Канал удален'}**\n"
+              f"👥 **Игроков:** {current_players}/{max_players}",
+        inline=False
+    )
+    
+    # Список игроков в канале
+    if member_ids:
+        members_list = "\n".join([f"• <@{user_id}>" for user_id in member_ids[:8]])
+        if len(member_ids) > 8:
+            members_list += f"\n• ... и еще {len(member_ids) - 8} игроков"
+        
+        embed.add_field(
+            name=f"👥 В КАНАЛЕ ({len(member_ids)})",
+            value=members_list,
+            inline=True
+        )
+    else:
+        embed.add_field(
+            name="👥 В КАНАЛЕ",
+            value="*Канал пуст*",
+            inline=True
+        )
+    
+    # Список присоединившихся к поиску
+    if record.joined_users:
+        joined_list = []
+        shown_ids = list(record.joined_users)[:6]
+        members = await resolve_members(voice_channel.guild, shown_ids) if voice_channel else {}
+        for user_id in shown_ids:
+            user = members.get(user_id)
+            if user:
+                joined_list.append(f"• {user.mention}")
+        
+        if len(record.joined_users) > 6:
+            joined_list.append(f"• ... и еще {len(record.joined_users) - 6}")
+        
+        embed.add_field(
+            name=f"🎮 ОТКЛИКНУЛИСЬ ({len(record.joined_users)})",
+            value="\n".join(joined_list) if joined_list else "*Пока никто*",
+            inline=True
+        )
+    else:
+        embed.add_field(
+            name="🎮 ОТКЛИКНУЛИСЬ",
+            value="*Пока никто*",
+            inline=True
+        )
+    
+    embed.set_footer(text="Заходи быстрее💀")
+    if record.author_avatar_url:
+        embed.set_thumbnail(url=record.author_avatar_url)
+    
+    return embed
+
+async def remove_search(bot, user_id):
+    """Удаляет поиск по ID пользователя"""
+    record = active_searches.pop(user_id, None)
+    if record:
+        save_state()
+        schedule_board_render(bot, record.guild_id)
+        message = get_search_message(bot, record)
+        if message:
+            await safe_delete_message(message)
+
+async def check_active_searches(bot):
+    """Проверяет все активные поиски и удаляет неактуальные"""
+    for user_id, record in list(active_searches.items()):
+        try:
+            # Проверяем существует ли еще канал
+            voice_channel = bot.get_channel(record.voice_channel_id)
+            if not voice_channel:
+                await remove_search(bot, user_id)
+                continue
+                
+            # Проверяем находится ли автор еще в канале
+            author_in_channel = user_id in voice_channel.voice_states
+            
+            if not author_in_channel:
+                await remove_search(bot, user_id)
+                continue
+                
+            # Обновляем сообщение с актуальной информацией; поиски с доски
+            # своего сообщения не имеют и обновляются вместе с доской
+            if record.message_id:
+                await update_search_message(bot, record)
+                
+        except Exception as e:
+            print(f"❌ Ошибка при проверке поиска: {e}")
+            await remove_search(bot, user_id)
+    
+    # Число игроков в каналах меняется без событий поиска; страница без изменений не редактируется
+    for guild_id in list(search_boards):
+        schedule_board_render(bot, guild_id)
+
+async def restore_searches(bot, guild, saved_searches):
+    """Восстанавливает поиски из хранилища и заново привязывает кнопки"""
+    restored = 0
+    
+    for user_id, info in saved_searches.items():
+        if info.get('guild_id') != guild.id:
+            continue
+        
+        record = load_record(SearchRecord, info, user_id)
+        if not record:
+            continue
+        voice_channel = guild.get_channel(record.voice_channel_id)
+        author_in_channel = voice_channel and record.author_id in voice_channel.voice_states
+        
+        # Поиск с доски: своего сообщения нет, доска перерисуется целиком
+        if not record.message_id:
+            if author_in_channel and SEARCH_BOARD_MODE:
+                active_searches[record.author_id] = record
+                restored += 1
+            continue
+        
+        channel = guild.get_channel(record.channel_id)
+        if not channel:
+            continue
+        message = channel.get_partial_message(record.message_id)
+        
+        # Поиск актуален, только если автор все еще в своем голосовом канале
+        if not author_in_channel:
+            await safe_delete_message(message)
+            continue
+        
+        try:
+            embed = await create_search_embed(bot, record)
+            await message.edit(embed=embed, view=PlayerSearchView(record.author_id))
+        except Exception as e:
+            print(f"⚠️ Не удалось восстановить поиск {user_id}: {e}")
+            continue
+        
+        active_searches[record.author_id] = record
+        restored += 1
+    
+    return restored
+
+class PlayerSearch(commands.Cog):
+    """Поиск игроков"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    async def cog_load(self):
+        self.update_searches_task.start()
+    
+    async def cog_unload(self):
+        self.update_searches_task.cancel()
+    
+    async def shutdown(self):
+        """Останавливает обновление поисков; сами поиски уходят в снимок"""
+        self.update_searches_task.cancel()
+        return f"поисков в снимке: {len(active_searches)}"
+    
+    async def reconcile_guild(self, guild, state):
+        """Восстанавливает поиски сервера и доску после запуска"""
+        restored = await restore_searches(self.bot, guild, state.get('searches', {}))
+        
+        saved_board = state.get('search_boards', {}).get(str(guild.id))
+        board = saved_board and load_record(SearchBoardRecord, saved_board, guild.id)
+        if board:
+            search_boards[guild.id] = board
+        
+        try:
+            if SEARCH_BOARD_MODE:
+                # Перерисовка заново привязывает меню и кнопки к сообщениям доски
+                await render_board(guild)
+            else:
+                await remove_board(guild)
+        except Exception as e:
+            print(f"❌ Ошибка восстановления доски поиска: {e}")
+        return f"поисков {restored}"
+    
+    @tasks.loop(seconds=30)
+    async def update_searches_task(self):
+        """Задача для автоматического обновления поисков"""
+        await check_active_searches(self.bot)
+    
+    @update_searches_task.before_loop
+    async def before_update_searches(self):
+        await self.bot.wait_until_ready()
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Снимает поиск, когда автор выходит из голосового канала"""
+        try:
+            if before.channel and member.id in active_searches:
+                # Под блокировкой автора, чтобы не пересечься с созданием поиска
+                async with member_locks.hold(member.guild.id, member.id, timeout=LOCK_TIMEOUT_SECONDS):
+                    await remove_search(self.bot, member.id)
+        except Exception as e:
+            print(f"❌ Ошибка при снятии поиска: {e}")
+
+    @commands.hybrid_command(name='i')
+    @app_commands.describe(search_text="Описание поиска")
+    async def player_search(self, ctx, *, search_text: str = "Ищем игроков!"):
+        """Создает объявление о поиске игроков с полной информацией"""
+        if not await command_cooldown(ctx, 'player_search', 10):
+            return
+            
+        try:
+            await begin_command(ctx)
+        except:
+            pass
+        
+        try:
+            async with member_locks.hold(ctx.guild.id, ctx.author.id, timeout=LOCK_TIMEOUT_SECONDS):
+                await self.create_search(ctx, search_text)
+        except asyncio.TimeoutError:
+            await safe_send_message(ctx, BUSY_MESSAGE, delete_after=10)
+
+    async def create_search(self, ctx, search_text):
+        """Проверки и публикация поиска; вызывается под блокировкой автора"""
+        if ctx.author.id in active_searches:
+            embed = discord.Embed(
+                title="❌ Ошибка",
+                description="У вас уже есть активный поиск! Завершите его перед созданием нового.",
+                color=0xff0000
+            )
+            await safe_send_message(ctx, embed=embed, delete_after=10)
+            return
+        
+        if not ctx.author.voice:
+            embed = discord.Embed(
+                title="❌ Ошибка",
+                description="Вы должны находиться в голосовом канале для создания поиска!",
+                color=0xff0000
+            )
+            await safe_send_message(ctx, embed=embed, delete_after=10)
+            return
+        
+        voice_channel = ctx.author.voice.channel
+        
+        record = SearchRecord(
+            guild_id=ctx.guild.id,
+            author_id=ctx.author.id,
+            voice_channel_id=voice_channel.id,
+            channel_id=0,
+            message_id=0,
+            search_text=search_text,
+            author_avatar_url=ctx.author.avatar.url if ctx.author.avatar else "",
+            last_update=int(time.time()),
+        )
+        
+        if SEARCH_BOARD_MODE:
+            active_searches[ctx.author.id] = record
+            save_state()
+            schedule_board_render(self.bot, ctx.guild.id)
+            board_channel = ctx.guild.get_channel(guild_config(ctx.guild.id).player_search_channel_id)
+            where = f" в {board_channel.mention}" if board_channel else ""
+            await safe_send_message(ctx, f"✅ Поиск добавлен на доску{where}", delete_after=10)
+            return
+        
+        # Сразу отправляем готовое объявление, без промежуточного сообщения
+        embed = await create_search_embed(self.bot, record)
+        message = await safe_send_message(ctx, embed=embed, view=PlayerSearchView(ctx.author.id), ephemeral=False)
+        if not message:
+            return
+        
+        record.channel_id = message.channel.id
+        record.message_id = message.id
+        active_searches[ctx.author.id] = record
+        save_state()
+
+    @commands.hybrid_command(name='поиск')
+    @app_commands.describe(search_text="Описание поиска")
+    async def player_search_ru(self, ctx, *, search_text: str = "Ищем игроков!"):
+        """Альтернативная команда для поиска игроков"""
+        await self.player_search(ctx, search_text=search_text)
+
+
+async def setup(bot):
+    await bot.add_cog(PlayerSearch(bot))
@@ -0,0 +1,171 @@
+"""Расширение временных голосовых каналов: создание по триггер-каналу и удаление пустых."""
+import asyncio
+import time
+
+from discord.ext import commands
+
+from core import (
+    LOCK_TIMEOUT_SECONDS,
+    active_temp_channels,
+    channel_locks,
+    guild_config,
+    load_record,
+    inflight,
+    safe_delete_channel,
+    voice_member_ids,
+)
+from records import TempChannelRecord
+
+ORPHAN_DELETE_BATCH_SIZE = 5
+
+async def get_temp_category(guild, category_name):
+    """Находит категорию временных каналов или создает ее (одну на сервер даже при одновременных входах)"""
+    async with channel_locks.hold(guild.id, category_name, timeout=LOCK_TIMEOUT_SECONDS):
+        for cat in guild.categories:
+            if cat.name == category_name:
+                return cat
+        
+        with inflight:
+            return await guild.create_category(category_name)
+
+async def create_temp_channel(member, config, channel_type):
+    """Создает временный канал по настройкам сервера, с которыми сработал триггер"""
+    try:
+        template = config.channel_templates[channel_type]
+        guild = member.guild
+        trigger_channel_id = config.trigger_channels[channel_type]
+        
+        category = await get_temp_category(guild, template.category_name)
+        
+        # Номер канала и создание — под блокировкой триггер-канала, иначе
+        # одновременные входы получают одинаковые номера
+        async with channel_locks.hold(guild.id, trigger_channel_id, timeout=LOCK_TIMEOUT_SECONDS):
+            # Повторное событие или участник уже ушел из триггер-канала — создавать нечего
+            if not member.voice or not member.voice.channel or member.voice.channel.id != trigger_channel_id:
+                return
+            
+            channel_number = len([c for c in guild.voice_channels if c.name.startswith(template.prefix)]) + 1
+            channel_name = template.name.format(channel_number)
+            
+            with inflight:
+                new_channel = await guild.create_voice_channel(
+                    name=channel_name,
+                    user_limit=template.user_limit,
+                    category=category
+                )
+            
+            # Запись создаем до перемещения, чтобы событие перехода уже видело тип канала
+            active_temp_channels[new_channel.id] = TempChannelRecord(
+                channel_type=channel_type,
+                created_by=member.id,
+                created_at=int(time.time()),
+            )
+            with inflight:
+                await member.move_to(new_channel)
+        
+        print(f"✅ Создан временный канал: {channel_name}")
+        
+    except asyncio.TimeoutError:
+        print(f"⚠️ Не дождались очереди на создание канала для {member.name}")
+    except Exception as e:
+        print(f"❌ Ошибка создания временного канала: {e}")
+
+async def delete_empty_channels(channels):
+    """Удаляет пустые каналы пачками, чтобы не упираться в rate limit"""
+    deleted = 0
+    for i in range(0, len(channels), ORPHAN_DELETE_BATCH_SIZE):
+        batch = channels[i:i + ORPHAN_DELETE_BATCH_SIZE]
+        results = await asyncio.gather(*(safe_delete_channel(channel) for channel in batch))
+        for channel, ok in zip(batch, results):
+            if ok:
+                active_temp_channels.pop(channel.id, None)
+                deleted += 1
+    return deleted
+
+async def rebuild_temp_channels(guild, saved_channels=None):
+    """Восстанавливает active_temp_channels из временной категории и удаляет пустые сироты
+    
+    Записи из снимка сохраняют автора и время создания, но канал все равно
+    проверяется по живому серверу: удаленные и опустевшие каналы не восстанавливаются.
+    """
+    saved_channels = saved_channels or {}
+    config = guild_config(guild.id)
+    orphans = []
+    restored = 0
+    
+    for category in guild.categories:
+        if category.name not in config.category_names:
+            continue
+        
+        for channel in category.voice_channels:
+            if channel.id in config.trigger_types:
+                continue
+            
+            channel_type = config.template_type(channel.name)
+            if not channel_type:
+                continue
+            
+            if voice_member_ids(channel):
+                saved = saved_channels.get(str(channel.id))
+                record = saved and load_record(TempChannelRecord, saved, channel.id)
+                if record:
+                    active_temp_channels[channel.id] = record
+                else:
+                    active_temp_channels[channel.id] = TempChannelRecord(
+                        channel_type=channel_type,
+                        created_by=0,
+                        created_at=int(channel.created_at.timestamp()),
+                    )
+                restored += 1
+            else:
+                orphans.append(channel)
+    
+    deleted = await delete_empty_channels(orphans)
+    return restored, deleted
+
+class TempChannels(commands.Cog):
+    """Временные голосовые каналы"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    async def reconcile_guild(self, guild, state):
+        """Восстанавливает временные каналы сервера после запуска"""
+        restored, deleted = await rebuild_temp_channels(guild, state.get('temp_channels'))
+        return f"каналов {restored} (удалено пустых: {deleted})"
+    
+    async def shutdown(self):
+        """При остановке сразу удаляет пустые каналы, не дожидаясь отложенного удаления"""
+        empty = []
+        for channel_id in list(active_temp_channels):
+            channel = self.bot.get_channel(channel_id)
+            if channel and not voice_member_ids(channel):
+                empty.append(channel)
+        
+        return f"удалено пустых каналов: {await delete_empty_channels(empty)}"
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Создание временных каналов по триггеру"""
+        try:
+            # Во время остановки новые каналы не создаем
+            if inflight.accepting and after.channel:
+                config = guild_config(member.guild.id)
+                channel_type = config.trigger_types.get(after.channel.id)
+                if channel_type:
+                    await create_temp_channel(member, config, channel_type)
+            
+            if before.channel:
+                if before.channel.id in active_temp_channels and not voice_member_ids(before.channel):
+                    await asyncio.sleep(10)
+                    # Несколько выходов подряд не должны удалять канал несколько раз
+                    async with channel_locks.hold(before.channel.guild.id, before.channel.id, timeout=LOCK_TIMEOUT_SECONDS):
+                        if before.channel.id in active_temp_channels and not voice_member_ids(before.channel):
+                            if await safe_delete_channel(before.channel):
+                                active_temp_channels.pop(before.channel.id, None)
+        except Exception as e:
+            print(f"❌ Ошибка в on_voice_state_update: {e}")
+
+
+async def setup(bot):
+    await bot.add_cog(TempChannels(bot))
@@ -0,0 +1,371 @@
+"""Расширение отпусков: !отпуск и !вернулся."""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core import (
+    BUSY_MESSAGE,
+    LOCK_TIMEOUT_SECONDS,
+    active_vacations,
+    begin_command,
+    command_cooldown,
+    guild_config,
+    load_record,
+    member_locks,
+    resolve_members,
+    safe_add_roles,
+    safe_remove_roles,
+    safe_send_message,
+    save_state,
+)
+from embed_templates import embed_templates
+from records import VacationRecord, parse_member_key
+from vacation_history import VacationHistory
+from validation import parse_date, parse_vacation_duration
+
+VACATION_HISTORY_DB = os.getenv('VACATION_HISTORY_DB', 'vacation_history.db')
+VACATION_HISTORY_SHOWN = 25
+
+embed_templates.register(
+    "vacation.usage",
+    title="🏖️ Система отпусков",
+    description="**Использование:** `!отпуск <длительность>`\n\n"
+                "**Доступные варианты:**\n"
+                "• `!отпуск 3д` - 1-3 дня\n"
+                "• `!отпуск неделя` - 7 дней\n"
+                "• `!отпуск 2недели` - 14 дней\n"
+                "**Для досрочного возвращения:** `!вернулся`",
+    color=0x3498db
+)
+embed_templates.register(
+    "vacation.role_failed",
+    title="❌ Ошибка прав",
+    description="Не удалось выдать роль отпуска. Проверьте права бота.",
+    color=0xff0000
+)
+embed_templates.register(
+    "vacation.failed",
+    title="❌ Ошибка",
+    description="Произошла ошибка при оформлении отпуска. Попробуйте позже.",
+    color=0xff0000
+)
+embed_templates.register(
+    "back.role_failed",
+    title="❌ Ошибка прав",
+    description="Не удалось снять роль отпуска. Проверьте права бота.",
+    color=0xff0000
+)
+embed_templates.register(
+    "back.failed",
+    title="❌ Ошибка",
+    description="Произошла ошибка при снятии роли отпуска. Попробуйте позже.",
+    color=0xff0000
+)
+
+def build_admin_notice_embed(mention, duration, end_date):
+    """Уведомление администраторам о новом отпуске"""
+    embed = discord.Embed(title="🏖️ Новая заявка на отпуск", color=0x00ff00)
+    embed.add_field(name="👤 Сотрудник", value=mention, inline=True)
+    embed.add_field(name="⏱️ Длительность", value=duration, inline=True)
+    embed.add_field(name="📅 Дата окончания", value=end_date, inline=True)
+    return embed
+
+def build_vacation_accepted_embed(mention, duration, end_date):
+    return discord.Embed(
+        title="🎉 Заявка на отпуск принята!",
+        description=f"**{mention}, вы получили роль 🏖️ В отпуске!**\n\n"
+                    f"**📅 Период отпуска:** {duration}\n"
+                    f"**⏰ Дата окончания:** {end_date}\n\n"
+                    f"Для досрочного возвращения используйте команду `!вернулся`\n"
+                    f"**Хорошего отдыха! 🌴☀️**",
+        color=0x00ff00
+    )
+
+def build_welcome_back_embed(mention):
+    return discord.Embed(
+        title="🎉 Добро пожаловать обратно!",
+        description=f"**{mention}, рады вашему возвращению!**\n\n"
+                    f"Роль **🏖️ В отпуске** была успешно снята.\n"
+                    f"Приятной игры! 🎮",
+        color=0x00ff00
+    )
+
+async def restore_vacations(guild, saved_vacations):
+    """Восстанавливает отпуска из хранилища"""
+    vacation_role = guild.get_role(guild_config(guild.id).vacation_role_id)
+    restored = 0
+    
+    # Ключ хранилища — 'guild_id:user_id', отпуска других серверов пропускаем
+    guild_vacations = {}
+    for key, info in saved_vacations.items():
+        member_key = parse_member_key(key)
+        if member_key and member_key[0] == guild.id:
+            guild_vacations[member_key[1]] = info
+    
+    # Без полного кэша участников роли проверяем по участникам, подгруженным одним запросом
+    members = await resolve_members(guild, list(guild_vacations))
+    
+    for user_id, info in guild_vacations.items():
+        # Пропускаем тех, с кого роль уже сняли вручную
+        member = members.get(user_id)
+        if member and vacation_role and vacation_role not in member.roles:
+            continue
+        
+        record = load_record(VacationRecord, info, user_id)
+        if record:
+            active_vacations[(guild.id, user_id)] = record
+            restored += 1
+    
+    return restored
+
+def format_vacation_rows(rows, with_member=True):
+    """Строки списка отпусков: участник, период и длительность"""
+    lines = []
+    for user_id, start_at, end_at, duration in rows[:VACATION_HISTORY_SHOWN]:
+        period = (f"{datetime.fromtimestamp(start_at).strftime('%d.%m.%Y')} — "
+                  f"{datetime.fromtimestamp(end_at).strftime('%d.%m.%Y %H:%M')}")
+        lines.append(f"• <@{user_id}> {period} ({duration})" if with_member else f"• {period} ({duration})")
+    if len(rows) > VACATION_HISTORY_SHOWN:
+        lines.append(f"... и еще {len(rows) - VACATION_HISTORY_SHOWN}")
+    return "\n".join(lines)
+
+class Vacation(commands.Cog):
+    """Система отпусков"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.history = VacationHistory(VACATION_HISTORY_DB)
+    
+    async def cog_load(self):
+        try:
+            await asyncio.to_thread(self.history.load)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки истории отпусков: {e}")
+    
+    async def record_history(self, method, *args):
+        """Пишет в историю отпусков; ошибка базы не должна ломать саму команду"""
+        try:
+            await asyncio.to_thread(method, *args)
+        except Exception as e:
+            print(f"❌ Ошибка записи истории отпусков: {e}")
+    
+    async def reconcile_guild(self, guild, state):
+        """Восстанавливает отпуска сервера после запуска"""
+        return f"отпусков {await restore_vacations(guild, state.get('vacations', {}))}"
+
+    @commands.hybrid_command(name='отпуск')
+    @app_commands.describe(duration="Длительность: 3д, неделя или 2недели")
+    async def vacation_command(self, ctx, duration: str = None):
+        """Простая команда для оформления отпуска"""
+        if not await command_cooldown(ctx, 'vacation', 10):
+            return
+            
+        try:
+            user = ctx.author
+            
+            if not duration:
+                await safe_send_message(ctx, embed=embed_templates.get("vacation.usage"), delete_after=30)
+                return
+            
+            # Парсим длительность
+            parsed_duration = parse_vacation_duration(duration)
+            if not parsed_duration:
+                await safe_send_message(ctx, "❌ Неверная длительность. Используйте: 3д, неделя, 2недели", delete_after=10)
+                return
+            time_delta, display_duration = parsed_duration
+            
+            config = guild_config(ctx.guild.id)
+            vacation_role = ctx.guild.get_role(config.vacation_role_id)
+            if not vacation_role:
+                await safe_send_message(ctx, "❌ Роль отпуска не найдена!", delete_after=10)
+                return
+            
+            # Дальше ожидание блокировки и запросы к API — дольше 3 секунд на ответ.
+            # Подтверждение отпуска публичное, как и прежде
+            await begin_command(ctx, defer=True, ephemeral=False, delete_message=False)
+            
+            # Проверка, выдача роли и запись — под блокировкой участника. Кэш ролей
+            # обновляется событием gateway с задержкой, поэтому повторную заявку
+            # отсекает запись в active_vacations, сделанная первой
+            async with member_locks.hold(ctx.guild.id, user.id, timeout=LOCK_TIMEOUT_SECONDS):
+                # Проверяем, не в отпуске ли уже
+                if vacation_role in user.roles or (ctx.guild.id, user.id) in active_vacations:
+                    await safe_send_message(ctx, "❌ Вы уже в отпуске!", delete_after=10, ephemeral=False)
+                    return
+                
+                # Выдаем роль с проверкой прав
+                role_added = await safe_add_roles(user, vacation_role)
+                
+                if not role_added:
+                    await safe_send_message(ctx, embed=embed_templates.get("vacation.role_failed"), delete_after=15, ephemeral=False)
+                    return
+                
+                # Отправляем уведомление в админский канал
+                admin_channel = ctx.guild.get_channel(config.vacation_admin_channel_id)
+                start_date = datetime.now()
+                end_date = start_date + time_delta
+                admin_message_id = 0
+                
+                if admin_channel:
+                    embed = build_admin_notice_embed(user.mention, display_duration, end_date.strftime("%d.%m.%Y %H:%M"))
+                    embed.timestamp = datetime.now()
+                    
+                    try:
+                        admin_message_id = (await admin_channel.send(embed=embed)).id
+                    except Exception as e:
+                        print(f"⚠️ Не удалось отправить сообщение в админский канал: {e}")
+                
+                # Сохраняем информацию об отпуске
+                active_vacations[(ctx.guild.id, user.id)] = VacationRecord(
+                    guild_id=ctx.guild.id,
+                    end_at=int(end_date.timestamp()),
+                    admin_message_id=admin_message_id,
+                    duration=display_duration,
+                )
+                save_state()
+                await self.record_history(
+                    self.history.record_start, ctx.guild.id, user.id,
+                    int(start_date.timestamp()), int(end_date.timestamp()), display_duration
+                )
+            
+            # Подтверждаем пользователю
+            embed = build_vacation_accepted_embed(user.mention, display_duration, end_date.strftime('%d.%m.%Y в %H:%M'))
+            if user.avatar:
+                embed.set_thumbnail(url=user.avatar.url)
+            await safe_send_message(ctx, embed=embed, ephemeral=False)
+            
+        except asyncio.TimeoutError:
+            await safe_send_message(ctx, BUSY_MESSAGE, delete_after=10, ephemeral=False)
+        except Exception as e:
+            print(f"❌ Ошибка при обработке заявки на отпуск: {e}")
+            await safe_send_message(ctx, embed=embed_templates.get("vacation.failed"), delete_after=10, ephemeral=False)
+
+    @commands.hybrid_command(name='вернулся')
+    async def back_from_vacation(self, ctx):
+        """Снимает роль отпуска"""
+        if not await command_cooldown(ctx, 'back_from_vacation', 5):
+            return
+            
+        try:
+            # Возвращение объявляется публично, как и отпуск
+            await begin_command(ctx, defer=True, ephemeral=False, delete_message=False)
+            user = ctx.author
+            config = guild_config(ctx.guild.id)
+            vacation_role = ctx.guild.get_role(config.vacation_role_id)
+            
+            async with member_locks.hold(ctx.guild.id, user.id, timeout=LOCK_TIMEOUT_SECONDS):
+                if vacation_role and vacation_role in user.roles:
+                    # Снимаем роль с проверкой прав
+                    role_removed = await safe_remove_roles(user, vacation_role)
+                    
+                    if not role_removed:
+                        await safe_send_message(ctx, embed=embed_templates.get("back.role_failed"), delete_after=15, ephemeral=False)
+                        return
+                    
+                    # Удаляем сообщение из админского канала
+                    vacation = active_vacations.get((ctx.guild.id, user.id))
+                    if vacation:
+                        admin_channel = ctx.guild.get_channel(config.vacation_admin_channel_id)
+                        if admin_channel and vacation.admin_message_id:
+                            try:
+                                admin_message = await admin_channel.fetch_message(vacation.admin_message_id)
+                                await admin_message.delete()
+                            except:
+                                pass
+                        
+                        del active_vacations[(ctx.guild.id, user.id)]
+                        save_state()
+                    
+                    await self.record_history(self.history.record_end, ctx.guild.id, user.id, int(datetime.now().timestamp()))
+                    
+                    await safe_send_message(ctx, embed=build_welcome_back_embed(user.mention), ephemeral=False)
+                else:
+                    await safe_send_message(ctx, "❌ У вас нет роли отпуска.", delete_after=10, ephemeral=False)
+                
+        except asyncio.TimeoutError:
+            await safe_send_message(ctx, BUSY_MESSAGE, delete_after=10, ephemeral=False)
+        except Exception as e:
+            print(f"❌ Ошибка при снятии роли отпуска: {e}")
+            await safe_send_message(ctx, embed=embed_templates.get("back.failed"), delete_after=10, ephemeral=False)
+
+    # ---------- календарь отпусков ----------
+
+    @commands.hybrid_command(name='отпуска_на')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(date="Дата: дд.мм.гггг или дд.мм (по умолчанию сегодня)")
+    async def vacations_on_command(self, ctx, *, date: str = None):
+        """Кто в отпуске в указанный день (только для администраторов)"""
+        await begin_command(ctx)
+        
+        day = parse_date(date) if date else datetime.combine(datetime.now().date(), datetime.min.time())
+        if not day:
+            await safe_send_message(ctx, "❌ Дата должна быть в формате дд.мм.гггг или дд.мм.", delete_after=10)
+            return
+        
+        await self.send_calendar(ctx, f"🏖️ В отпуске {day.strftime('%d.%m.%Y')}", day, day + timedelta(days=1))
+
+    @commands.hybrid_command(name='отпуска_период')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(start="Начало: дд.мм.гггг [чч:мм]", end="Конец: дд.мм.гггг [чч:мм], день входит целиком")
+    async def vacations_during_command(self, ctx, start: str, end: str):
+        """Кто будет в отпуске во время события (только для администраторов)"""
+        await begin_command(ctx)
+        
+        window_start = parse_date(start)
+        window_end = parse_date(end, end_of_day=True)
+        if not window_start or not window_end or window_end <= window_start:
+            await safe_send_message(ctx, "❌ Укажите начало и конец периода: `!отпуска_период 01.12.2025 07.12.2025`", delete_after=15)
+            return
+        
+        title = f"🗓️ В отпуске с {window_start.strftime('%d.%m.%Y %H:%M')} по {window_end.strftime('%d.%m.%Y %H:%M')}"
+        await self.send_calendar(ctx, title, window_start, window_end)
+
+    async def send_calendar(self, ctx, title, window_start, window_end):
+        try:
+            rows = await asyncio.to_thread(
+                self.history.overlapping, ctx.guild.id, int(window_start.timestamp()), int(window_end.timestamp())
+            )
+        except Exception as e:
+            print(f"❌ Ошибка чтения истории отпусков: {e}")
+            await safe_send_message(ctx, "❌ Не удалось прочитать историю отпусков.", delete_after=10)
+            return
+        
+        embed = discord.Embed(
+            title=title,
+            description=format_vacation_rows(rows) if rows else "*Никто не в отпуске*",
+            color=0x3498db
+        )
+        embed.set_footer(text=f"Всего: {len(rows)}")
+        await safe_send_message(ctx, embed=embed, delete_after=120)
+
+    @commands.hybrid_command(name='история_отпусков')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(member="Участник")
+    async def vacation_history_command(self, ctx, member: discord.User):
+        """Последние отпуска участника (только для администраторов)"""
+        await begin_command(ctx)
+        
+        try:
+            rows = await asyncio.to_thread(self.history.member_history, ctx.guild.id, member.id, VACATION_HISTORY_SHOWN)
+        except Exception as e:
+            print(f"❌ Ошибка чтения истории отпусков: {e}")
+            await safe_send_message(ctx, "❌ Не удалось прочитать историю отпусков.", delete_after=10)
+            return
+        
+        embed = discord.Embed(
+            title=f"🏖️ Отпуска {member.display_name}",
+            description=format_vacation_rows(rows, with_member=False) if rows else "*Отпусков не было*",
+            color=0x3498db
+        )
+        await safe_send_message(ctx, embed=embed, delete_after=120)
+
+
+async def setup(bot):
+    await bot.add_cog(Vacation(bot))
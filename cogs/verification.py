@@ -0,0 +1,973 @@
+"""Расширение верификации: !verify, смена ника, проверка статуса и массовые операции со списком игроков."""
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+import core
+from core import (
+    BUSY_MESSAGE,
+    FULL_MEMBER_CACHE,
+    MEMBER_CACHE_POLICY,
+    LOCK_TIMEOUT_SECONDS,
+    begin_command,
+    command_cooldown,
+    guild_config,
+    load_record,
+    member_locks,
+    resolve_members,
+    safe_add_roles,
+    safe_remove_roles,
+    safe_send_message,
+    save_state,
+    take_handover,
+    unclaimed_verified,
+    verified_players,
+)
+from embed_templates import embed_templates
+from records import VerifiedPlayer, parse_member_key
+from validation import format_server_nickname, parse_verification_text
+
+# ==================== ШАБЛОНЫ EMBED ====================
+
+NICKNAME_INSTRUCTION = (
+    "1. **Нажмите на название сервера** в левом верхнем углу\n"
+    "2. Выберите **'Профили'** → **'Личные профили сервера'**\n"
+)
+
+embed_templates.register(
+    "verify.usage",
+    title="❌ Неверный формат",
+    description="**Использование:** `!verify <никнейм> (<имя>)`\n\n"
+                "**Пример:** `!verify PlayerName (Алексей)`\n\n"
+                "**Правила:**\n"
+                "• Никнейм: только английские буквы, цифры и символы\n"
+                "• Имя в скобках: только русские буквы\n"
+                "• Скобки обязательны!",
+    color=0xff0000
+)
+embed_templates.register(
+    "verify.format",
+    title="❌ Неверный формат",
+    description="**Правильный формат:** `никнейм (имя)`\n\n"
+                "**Пример:** `!verify PlayerName (Алексей)`\n\n"
+                "**Ошибки:**\n"
+                "• Используйте английские буквы для ника\n"
+                "• Используйте русские буквы для имени\n"
+                "• Не забудьте скобки вокруг имени",
+    color=0xff0000
+)
+embed_templates.register(
+    "verification.nickname_length",
+    title="❌ Ошибка в никнейме",
+    description="Никнейм должен быть от 3 до 20 символов",
+    color=0xff0000
+)
+embed_templates.register(
+    "verification.name_length",
+    title="❌ Ошибка в имени",
+    description="Имя должно быть от 2 до 15 символов",
+    color=0xff0000
+)
+embed_templates.register(
+    "verify.already_verified",
+    title="❌ Уже верифицирован",
+    description="Вы уже прошли верификацию ранее!",
+    color=0xff0000
+)
+embed_templates.register(
+    "verify.no_role",
+    title="❌ Ошибка сервера",
+    description="Роль верификации не найдена! Обратитесь к администратору.",
+    color=0xff0000
+)
+embed_templates.register(
+    "verify.role_failed",
+    title="❌ Ошибка прав",
+    description="Не удалось выдать роль верификации. Проверьте права бота.",
+    color=0xff0000
+)
+embed_templates.register(
+    "verify.failed",
+    title="❌ Ошибка",
+    description="Произошла ошибка при верификации. Попробуйте позже.",
+    color=0xff0000
+)
+embed_templates.register(
+    "change_nickname.usage",
+    title="❌ Неверный формат",
+    description="**Использование:** `!сменить_ник <никнейм> (<имя>)`\n\n"
+                "**Пример:** `!сменить_ник NewNickname (НовоеИмя)`",
+    color=0xff0000
+)
+embed_templates.register(
+    "change_nickname.not_verified",
+    title="❌ Ошибка",
+    description="Сначала пройдите верификацию командой `!verify`",
+    color=0xff0000
+)
+embed_templates.register(
+    "change_nickname.format",
+    title="❌ Неверный формат",
+    description="**Правильный формат:** `никнейм (имя)`\n\n"
+                "**Пример:** `!сменить_ник NewPlayer (Алексей)`",
+    color=0xff0000
+)
+embed_templates.register(
+    "change_nickname.failed",
+    title="❌ Ошибка",
+    description="Произошла ошибка при смене ника. Попробуйте позже.",
+    color=0xff0000
+)
+embed_templates.register(
+    "instruction",
+    title="📝 Инструкция по изменению серверного никнейма",
+    description="**Как изменить никнейм в личном профиле сервера:**\n\n"
+                + NICKNAME_INSTRUCTION +
+                "3. Найдите нужный сервер в списке\n"
+                "4. В поле **'Никнейм на сервере'** введите ваш ник\n"
+                "5. **Сохраните изменения**\n\n"
+                "**Формат ника для клана:** `PlayerName (Имя)`\n"
+                "**Пример:** `ProPlayer (Алексей)`",
+    color=0x3498db
+)
+embed_templates.register(
+    "verification_help",
+    title="🔐 ВЕРИФИКАЦИЯ ИГРОКА",
+    description="**Для доступа к серверу необходимо пройти верификацию!**\n\n"
+                "**Команда:** `!verify <никнейм> (<имя>)`\n\n"
+                "**Примеры:**\n"
+                "• `!verify ProPlayer (Алексей)`\n"
+                "• `!verify SniperWolf (Мария)`\n"
+                "• `!verify Top_Fragger (Иван)`\n\n"
+                "**Правила:**\n"
+                "• Никнейм: английские буквы, цифры, символы _-.\n"
+                "• Имя: только русские буквы в скобках\n"
+                "• Скобки вокруг имени обязательны!\n\n"
+                "**После верификации:**\n"
+                "• Вы получите специальную роль\n"
+                "• Получите подробную инструкцию по изменению ника\n"
+                "• Откроется доступ ко всем разделам сервера",
+    color=0x3498db
+)
+
+def build_verify_success_embed(real_name, pubg_nickname, verified_at, new_nickname, guild_name):
+    embed = discord.Embed(
+        title="✅ Верификация успешна!",
+        description=f"**Добро пожаловать, {real_name}!**\n\n"
+                    f"**Ваши данные:**\n"
+                    f"• 🎮 PUBG ник: `{pubg_nickname}`\n"
+                    f"• 👤 Ваше имя: `{real_name}`\n"
+                    f"• 📅 Верифицирован: `{verified_at}`\n"
+                    f"• 📛 Требуемый ник: `{new_nickname}`\n\n"
+                    f"Теперь у вас есть доступ ко всем возможностям сервера! 🎉",
+        color=0x00ff00
+    )
+    embed.add_field(
+        name="📝 ВАЖНО: Измените серверный никнейм вручную",
+        value=f"**Инструкция для изменения никнейма в личном профиле:**\n\n"
+              f"{NICKNAME_INSTRUCTION}"
+              f"3. Найдите сервер **'{guild_name}'**\n"
+              f"4. В поле **'Никнейм на сервере'** введите:\n"
+              f"```{new_nickname}```\n"
+              f"5. **Сохраните изменения**\n\n"
+              f"*Это необходимо для идентификации в клане*",
+        inline=False
+    )
+    return embed
+
+def build_nickname_dm_embed(guild_name, new_nickname):
+    """Инструкция по смене ника в личные сообщения"""
+    return discord.Embed(
+        title=f"📝 Инструкция по изменению ника на сервере {guild_name}",
+        description=f"**Пожалуйста, установите ваш серверный никнейм:**\n```{new_nickname}```\n\n"
+                    f"**Как это сделать:**\n"
+                    f"1. Нажмите на **название сервера** вверху слева\n"
+                    f"2. Выберите **'Профили'** → **'Личные профили сервера'**\n"
+                    f"3. Найдите сервер **'{guild_name}'**\n"
+                    f"4. В поле **'Никнейм на сервере'** введите:\n```{new_nickname}```\n"
+                    f"5. Нажмите **'Сохранить'**\n\n"
+                    f"После этого ваш ник будет отображаться как `{new_nickname}`",
+        color=0x3498db
+    )
+
+def build_nickname_changed_embed(pubg_nickname, real_name, new_nickname, updated_at, guild_name):
+    embed = discord.Embed(
+        title="✅ Данные обновлены!",
+        description=f"**Ваши данные обновлены!**\n\n"
+                    f"**Новые данные:**\n"
+                    f"• 🎮 PUBG ник: `{pubg_nickname}`\n"
+                    f"• 👤 Ваше имя: `{real_name}`\n"
+                    f"• 📛 Требуемый ник: `{new_nickname}`\n"
+                    f"• 📅 Обновлено: `{updated_at}`",
+        color=0x00ff00
+    )
+    embed.add_field(
+        name="📝 Инструкция по изменению ника",
+        value=f"**Чтобы изменить серверный никнейм:**\n\n"
+              f"1. Нажмите на **название сервера**\n"
+              f"2. Выберите **'Профили'** → **'Личные профили сервера'**\n"
+              f"3. Найдите **'{guild_name}'**\n"
+              f"4. В поле **'Никнейм на сервере'** введите:\n```{new_nickname}```\n"
+              f"5. **Сохраните изменения**",
+        inline=False
+    )
+    return embed
+
+def build_check_embed(display_name, player_info):
+    """Статус верификации участника; player_info — запись или None"""
+    if not player_info:
+        return discord.Embed(
+            title=f"❌ {display_name} не верифицирован",
+            description="Игрок еще не прошел верификацию.\n"
+                        "Используйте команду `!верификация` для инструкций.",
+            color=0xff0000
+        )
+    
+    verified_at = datetime.fromtimestamp(player_info.verified_at).strftime('%d.%m.%Y %H:%M')
+    embed = discord.Embed(
+        title=f"✅ {display_name} верифицирован",
+        description=f"**Данные игрока:**\n"
+                    f"• 🎮 PUBG ник: `{player_info.pubg_nickname}`\n"
+                    f"• 👤 Реальное имя: `{player_info.real_name}`\n"
+                    f"• 📅 Дата верификации: `{verified_at}`\n"
+                    f"• 📛 Требуемый ник: `{player_info.server_nickname}`",
+        color=0x00ff00
+    )
+    embed.add_field(name="📝 Инструкция", value="Используйте `!инструкция` для получения инструкции по изменению ника", inline=False)
+    return embed
+
+
+# ==================== ИМПОРТ И СИНХРОНИЗАЦИЯ ====================
+
+ROSTER_FIELDS = [
+    'discord_id', 'pubg_nickname', 'real_name', 'discord_name', 'verified_at',
+    'server_nickname', 'nickname_updated',
+]
+ROSTER_ERRORS = {
+    'format': "неверный формат никнейма или имени",
+    'nickname_length': "никнейм должен быть от 3 до 20 символов",
+    'name_length': "имя должно быть от 2 до 15 символов",
+}
+ROLE_SYNC_CONCURRENCY = 5
+ROLE_SYNC_BATCH_SIZE = 50
+role_sync_running = set()
+
+def format_roster_time(timestamp):
+    """Время для файла списка; 0 — «не было» — выгружается пустой строкой"""
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else ''
+
+def read_roster_time(row, key, default):
+    """Время из записи импорта в секундах epoch; пустое поле — default, ошибка — ValueError"""
+    value = row.get(key)
+    if not value:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(key)
+    return int(datetime.fromisoformat(value).timestamp())
+
+def guild_players(guild_id):
+    """Верифицированные игроки одного сервера: user_id -> запись"""
+    return {
+        user_id: player
+        for (player_guild_id, user_id), player in verified_players.items()
+        if player_guild_id == guild_id
+    }
+
+def export_roster(guild_id, file_format):
+    """Выгружает верифицированных игроков сервера в CSV или JSONL"""
+    rows = [
+        {
+            'discord_id': str(user_id),
+            'pubg_nickname': player.pubg_nickname,
+            'real_name': player.real_name,
+            'discord_name': player.discord_name,
+            'verified_at': format_roster_time(player.verified_at),
+            'server_nickname': player.server_nickname,
+            'nickname_updated': format_roster_time(player.nickname_updated),
+        }
+        for user_id, player in guild_players(guild_id).items()
+    ]
+    
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=ROSTER_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+    
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+def parse_roster(filename, content):
+    """Читает CSV или JSONL, возвращает пары (номер строки, запись)"""
+    if filename.lower().endswith('.csv'):
+        reader = csv.DictReader(io.StringIO(content))
+        return [(line_no, row) for line_no, row in enumerate(reader, 2)]
+    
+    rows = []
+    for line_no, line in enumerate(content.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            rows.append((line_no, json.loads(line)))
+        except json.JSONDecodeError:
+            rows.append((line_no, None))
+    return rows
+
+def validate_roster_row(row):
+    """Проверяет запись импорта по тем же правилам, что и !verify; возвращает (id, данные, ошибка)"""
+    if not isinstance(row, dict):
+        return None, None, "строка не разобрана"
+    
+    try:
+        user_id = int(row.get('discord_id'))
+    except (TypeError, ValueError):
+        return None, None, "некорректный discord_id"
+    
+    pubg_nickname, real_name, error = parse_verification_text(
+        f"{row.get('pubg_nickname') or ''} ({row.get('real_name') or ''})"
+    )
+    if error:
+        return user_id, None, ROSTER_ERRORS[error]
+    
+    try:
+        verified_at = read_roster_time(row, 'verified_at', int(datetime.now().timestamp()))
+    except ValueError:
+        return user_id, None, "некорректная дата verified_at"
+    # Без даты смены ника повторный импорт выгрузки обнулил бы отсрочку напоминаний
+    try:
+        nickname_updated = read_roster_time(row, 'nickname_updated', 0)
+    except ValueError:
+        return user_id, None, "некорректная дата nickname_updated"
+    
+    player = VerifiedPlayer(
+        pubg_nickname=pubg_nickname,
+        real_name=real_name,
+        verified_at=verified_at,
+        discord_name=row.get('discord_name') or '',
+        server_nickname=row.get('server_nickname') or format_server_nickname(pubg_nickname, real_name),
+        nickname_updated=nickname_updated,
+    )
+    return user_id, player, None
+
+def build_role_sync_embed(stage, added, removed, failed, total, started_at):
+    """Embed с прогрессом синхронизации ролей"""
+    done = added + removed + failed
+    return discord.Embed(
+        title=f"🔄 Синхронизация ролей: {stage}",
+        description=f"**Обработано:** {done}/{total}\n"
+                   f"• ✅ Выдано: {added}\n"
+                   f"• ➖ Снято: {removed}\n"
+                   f"• ❌ Ошибок: {failed}\n"
+                   f"**Прошло:** {time.monotonic() - started_at:.0f} сек",
+        color=0x3498db
+    )
+
+async def plan_role_sync(guild, role):
+    """Сравнивает владельцев роли верификации со списком верифицированных игроков"""
+    to_add = []
+    to_remove = []
+    
+    # Постранично через REST — работает при любой политике кэша участников
+    async for member in guild.fetch_members(limit=None):
+        if member.bot:
+            continue
+        
+        has_role = member.get_role(role.id) is not None
+        verified = (guild.id, member.id) in verified_players
+        if verified and not has_role:
+            to_add.append(member)
+        elif has_role and not verified:
+            to_remove.append(member)
+    
+    return to_add, to_remove
+
+# ==================== СООТВЕТСТВИЕ НИКОВ ====================
+
+# 0 — напоминания выключены
+NICKNAME_REMINDER_HOURS = int(os.getenv('NICKNAME_REMINDER_HOURS', '0'))
+NICKNAME_REMINDER_BATCH_SIZE = 10
+NICKNAME_REMINDER_DELAY_SECONDS = 2
+NICKNAME_REMINDER_REPEAT_SECONDS = 3 * 86400
+NICKNAME_GRACE_SECONDS = 3600
+NICKNAME_REPORT_SHOWN = 25
+
+class NicknameCompliance:
+    """Верифицированные участники, чей ник на сервере не совпадает с требуемым.
+
+    Обновляется по одному участнику из on_member_update и команд верификации;
+    полный обход участников нужен только при запуске и после импорта списка.
+    Работает только с полным кэшем участников: иначе guild.members неполон,
+    а on_member_update приходит не для всех, и отчет был бы молча пустым.
+    """
+    
+    def __init__(self):
+        self.noncompliant = {}
+        self.reminded = {}
+    
+    def check(self, guild_id, user_id, display_name):
+        """Пересчитывает одного участника, возвращает True, если ник в порядке"""
+        player = verified_players.get((guild_id, user_id))
+        if player is None or display_name == player.server_nickname:
+            self.forget(guild_id, user_id)
+            return True
+        self.noncompliant.setdefault(guild_id, {})[user_id] = display_name
+        return False
+    
+    def forget(self, guild_id, user_id):
+        guild_members = self.noncompliant.get(guild_id)
+        if guild_members:
+            guild_members.pop(user_id, None)
+        self.reminded.pop((guild_id, user_id), None)
+    
+    def seed(self, guild):
+        """Полный пересчет по кэшу участников сервера"""
+        self.noncompliant[guild.id] = {}
+        for member in guild.members:
+            if (guild.id, member.id) in verified_players:
+                self.check(guild.id, member.id, member.display_name)
+        return len(self.noncompliant[guild.id])
+    
+    def report(self, guild_id):
+        """Список (user_id, текущий ник, требуемый ник)"""
+        return [
+            (user_id, display_name, verified_players[(guild_id, user_id)].server_nickname)
+            for user_id, display_name in self.noncompliant.get(guild_id, {}).items()
+            if (guild_id, user_id) in verified_players
+        ]
+    
+    def due_reminders(self, guild_id, now, limit):
+        """Кому пора напомнить: прошел льготный срок после верификации и интервал с прошлого напоминания"""
+        due = []
+        for user_id in self.noncompliant.get(guild_id, {}):
+            player = verified_players.get((guild_id, user_id))
+            if player is None or now - max(player.verified_at, player.nickname_updated) < NICKNAME_GRACE_SECONDS:
+                continue
+            if now - self.reminded.get((guild_id, user_id), 0) < NICKNAME_REMINDER_REPEAT_SECONDS:
+                continue
+            due.append(user_id)
+            if len(due) >= limit:
+                break
+        return due
+
+class Verification(commands.Cog):
+    """Верификация игроков"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        # Список нарушителей переживает перезагрузку расширения
+        self.compliance = take_handover('verification.compliance', NicknameCompliance)
+    
+    async def cog_load(self):
+        if NICKNAME_REMINDER_HOURS > 0 and FULL_MEMBER_CACHE:
+            self.nickname_reminder_task.change_interval(hours=NICKNAME_REMINDER_HOURS)
+            self.nickname_reminder_task.start()
+    
+    async def cog_unload(self):
+        self.nickname_reminder_task.cancel()
+        core.handover['verification.compliance'] = self.compliance
+    
+    async def claim_unclaimed(self, guild):
+        """Относит к серверу верификации из хранилища до версии 3.
+        
+        Единственный сервер бота забирает все записи. При нескольких серверах
+        запись получает каждый сервер, где у участника есть роль верификации,
+        а сама запись остается в хранилище: участник мог выйти и вернуться
+        или быть на сервере, куда бота еще не добавили.
+        """
+        if not unclaimed_verified:
+            return 0
+        
+        if len(self.bot.guilds) == 1:
+            for user_id, record in unclaimed_verified.items():
+                verified_players.setdefault((guild.id, user_id), record)
+            claimed = len(unclaimed_verified)
+            unclaimed_verified.clear()
+            return claimed
+        
+        role_id = guild_config(guild.id).verified_role_id
+        members = await resolve_members(guild, list(unclaimed_verified))
+        claimed = 0
+        for user_id, member in members.items():
+            if member.get_role(role_id) is not None:
+                verified_players.setdefault((guild.id, user_id), unclaimed_verified[user_id])
+                claimed += 1
+        return claimed
+    
+    async def reconcile_guild(self, guild, state):
+        """Забирает старые записи верификации и находит участников с неверным ником"""
+        claimed = await self.claim_unclaimed(guild)
+        summary = f"верификаций из старого хранилища {claimed}, " if claimed else ""
+        if not FULL_MEMBER_CACHE:
+            return f"{summary}проверка ников выключена (кэш участников: {MEMBER_CACHE_POLICY})"
+        return f"{summary}ников не по формату {self.compliance.seed(guild)}"
+    
+    def restore_state(self, state):
+        """Загружает верифицированных игроков из хранилища"""
+        for key, data in state.get('verified', {}).items():
+            record = load_record(VerifiedPlayer, data, key)
+            if not record:
+                continue
+            member_key = parse_member_key(key)
+            if member_key:
+                verified_players[member_key] = record
+            else:
+                unclaimed_verified[int(key)] = record
+        
+        if unclaimed_verified:
+            print(f"⚠️ Верификаций без сервера (хранилище до версии 3): {len(unclaimed_verified)}, "
+                  f"серверы заберут их при сверке")
+        return f"верифицированных {len(verified_players)}"
+
+    @commands.hybrid_command(name='verify')
+    @app_commands.describe(verification_text="Никнейм и имя в формате: PlayerName (Алексей)")
+    async def verify_command(self, ctx, *, verification_text: str = None):
+        """Команда для верификации игрока"""
+        if not await command_cooldown(ctx, 'verify', 5):
+            return
+        
+        try:
+            await begin_command(ctx, defer=True)
+            
+            if not verification_text:
+                await safe_send_message(ctx, embed=embed_templates.get("verify.usage"), delete_after=30)
+                return
+
+            # Проверяем формат: никнейм (имя)
+            pubg_nickname, real_name, error = parse_verification_text(verification_text)
+            
+            if error == 'format':
+                await safe_send_message(ctx, embed=embed_templates.get("verify.format"), delete_after=30)
+                return
+
+            # Дополнительные проверки
+            if error:
+                await safe_send_message(ctx, embed=embed_templates.get(f"verification.{error}"), delete_after=15)
+                return
+
+            # Получаем роль верификации
+            verified_role = ctx.guild.get_role(guild_config(ctx.guild.id).verified_role_id)
+            if not verified_role:
+                await safe_send_message(ctx, embed=embed_templates.get("verify.no_role"), delete_after=15)
+                return
+
+            # Создаем новый никнейм
+            new_nickname = format_server_nickname(pubg_nickname, real_name)
+            
+            # Проверка и выдача роли под блокировкой: повторная заявка дождется первой
+            # и увидит уже сохраненную запись, а не выдаст роль второй раз
+            async with member_locks.hold(ctx.guild.id, ctx.author.id, timeout=LOCK_TIMEOUT_SECONDS):
+                if (ctx.guild.id, ctx.author.id) in verified_players:
+                    await safe_send_message(ctx, embed=embed_templates.get("verify.already_verified"), delete_after=15)
+                    return
+
+                # Выдаем роль верификации с проверкой прав
+                role_added = await safe_add_roles(ctx.author, verified_role)
+                
+                if not role_added:
+                    await safe_send_message(ctx, embed=embed_templates.get("verify.role_failed"), delete_after=15)
+                    return
+
+                # Сохраняем информацию о игроке
+                verified_players[(ctx.guild.id, ctx.author.id)] = VerifiedPlayer(
+                    pubg_nickname=pubg_nickname,
+                    real_name=real_name,
+                    verified_at=int(time.time()),
+                    discord_name=ctx.author.name,
+                    server_nickname=new_nickname,
+                )
+                save_state()
+                self.compliance.check(ctx.guild.id, ctx.author.id, ctx.author.display_name)
+
+            # Отправляем сообщение об успехе с инструкцией для личных профилей
+            embed = build_verify_success_embed(
+                real_name, pubg_nickname, datetime.now().strftime('%d.%m.%Y %H:%M'), new_nickname, ctx.guild.name
+            )
+            
+            if ctx.author.avatar:
+                embed.set_thumbnail(url=ctx.author.avatar.url)
+            
+            await safe_send_message(ctx, embed=embed, delete_after=60)
+
+            # Отправляем дополнительное сообщение в ЛС
+            try:
+                dm_embed = build_nickname_dm_embed(ctx.guild.name, new_nickname)
+                await ctx.author.send(embed=dm_embed)
+            except:
+                print(f"⚠️ Не удалось отправить ЛС пользователю {ctx.author.name}")
+
+            # Логируем верификацию
+            print(f"✅ Верифицирован: {ctx.author.name} -> {pubg_nickname} ({real_name})")
+
+        except asyncio.TimeoutError:
+            await safe_send_message(ctx, BUSY_MESSAGE, delete_after=10)
+        except Exception as e:
+            print(f"❌ Ошибка в верификации: {e}")
+            await safe_send_message(ctx, embed=embed_templates.get("verify.failed"), delete_after=15)
+
+    @commands.hybrid_command(name='сменить_ник')
+    @app_commands.describe(verification_text="Новый никнейм и имя в формате: PlayerName (Алексей)")
+    async def change_nickname(self, ctx, *, verification_text: str = None):
+        """Команда для смены ника"""
+        if not await command_cooldown(ctx, 'change_nickname', 10):
+            return
+            
+        try:
+            await begin_command(ctx, defer=True)
+            
+            if not verification_text:
+                await safe_send_message(ctx, embed=embed_templates.get("change_nickname.usage"), delete_after=30)
+                return
+
+            # Проверяем, верифицирован ли пользователь
+            if (ctx.guild.id, ctx.author.id) not in verified_players:
+                await safe_send_message(ctx, embed=embed_templates.get("change_nickname.not_verified"), delete_after=15)
+                return
+
+            # Проверяем формат: никнейм (имя)
+            pubg_nickname, real_name, error = parse_verification_text(verification_text)
+            
+            if error == 'format':
+                await safe_send_message(ctx, embed=embed_templates.get("change_nickname.format"), delete_after=30)
+                return
+
+            # Дополнительные проверки
+            if error:
+                await safe_send_message(ctx, embed=embed_templates.get(f"verification.{error}"), delete_after=15)
+                return
+
+            # Создаем новый никнейм
+            new_nickname = format_server_nickname(pubg_nickname, real_name)
+
+            # Запись меняем под той же блокировкой, что и верификация
+            async with member_locks.hold(ctx.guild.id, ctx.author.id, timeout=LOCK_TIMEOUT_SECONDS):
+                # Запись могли удалить, пока ждали блокировку
+                player = verified_players.get((ctx.guild.id, ctx.author.id))
+                if not player:
+                    await safe_send_message(ctx, embed=embed_templates.get("change_nickname.not_verified"), delete_after=15)
+                    return
+
+                # Обновляем информацию о игроке
+                verified_players[(ctx.guild.id, ctx.author.id)] = VerifiedPlayer(
+                    pubg_nickname=pubg_nickname,
+                    real_name=real_name,
+                    verified_at=player.verified_at,
+                    discord_name=ctx.author.name,
+                    server_nickname=new_nickname,
+                    nickname_updated=int(time.time()),
+                )
+                save_state()
+                self.compliance.check(ctx.guild.id, ctx.author.id, ctx.author.display_name)
+
+            # Отправляем сообщение об успехе с инструкцией
+            embed = build_nickname_changed_embed(
+                pubg_nickname, real_name, new_nickname, datetime.now().strftime('%d.%m.%Y %H:%M'), ctx.guild.name
+            )
+            
+            if ctx.author.avatar:
+                embed.set_thumbnail(url=ctx.author.avatar.url)
+            
+            await safe_send_message(ctx, embed=embed, delete_after=60)
+
+            print(f"✅ Данные обновлены: {ctx.author.name} -> {pubg_nickname} ({real_name})")
+
+        except asyncio.TimeoutError:
+            await safe_send_message(ctx, BUSY_MESSAGE, delete_after=10)
+        except Exception as e:
+            print(f"❌ Ошибка при смене ника: {e}")
+            await safe_send_message(ctx, embed=embed_templates.get("change_nickname.failed"), delete_after=15)
+
+    @commands.hybrid_command(name='инструкция')
+    async def instruction_command(self, ctx):
+        """Команда для получения инструкции по изменению ника"""
+        try:
+            await begin_command(ctx)
+        except:
+            pass
+        
+        await safe_send_message(ctx, embed=embed_templates.get("instruction"), delete_after=60)
+
+    @commands.hybrid_command(name='верификация')
+    async def verification_help(self, ctx):
+        """Помощь по верификации"""
+        try:
+            await begin_command(ctx)
+        except:
+            pass
+        
+        await safe_send_message(ctx, embed=embed_templates.get("verification_help"), delete_after=60)
+
+    @commands.hybrid_command(name='проверить')
+    @app_commands.describe(member="Участник для проверки")
+    async def check_verification(self, ctx, member: discord.User = None):
+        """Проверяет статус верификации"""
+        if not await command_cooldown(ctx, 'check_verification', 5):
+            return
+            
+        # Ответ откладываем, только если участника придется подгружать запросом
+        try:
+            await begin_command(ctx, defer=bool(member) and not ctx.guild.get_member(member.id))
+        except:
+            pass
+        
+        # Участника может не быть в кэше — подгружаем его по требованию
+        if member:
+            target_member = (await resolve_members(ctx.guild, [member.id])).get(member.id)
+            if not target_member:
+                await safe_send_message(ctx, "❌ Участник не найден на сервере.", delete_after=10)
+                return
+        else:
+            target_member = ctx.author
+        embed = build_check_embed(target_member.display_name, verified_players.get((ctx.guild.id, target_member.id)))
+        await safe_send_message(ctx, embed=embed, delete_after=30)
+
+    @commands.hybrid_command(name='экспорт_игроков')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(file_format="Формат файла: csv или jsonl")
+    async def export_roster_command(self, ctx, file_format: str = 'csv'):
+        """Выгружает список верифицированных игроков файлом (только для администраторов)"""
+        await begin_command(ctx)
+        
+        file_format = file_format.lower()
+        if file_format not in ('csv', 'jsonl'):
+            await safe_send_message(ctx, "❌ Формат должен быть csv или jsonl.", delete_after=10)
+            return
+        
+        content = export_roster(ctx.guild.id, file_format)
+        file = discord.File(io.BytesIO(content.encode('utf-8')), filename=f"verified_players.{file_format}")
+        await safe_send_message(ctx, f"📤 Верифицированных игроков: **{len(guild_players(ctx.guild.id))}**", file=file)
+
+    @commands.hybrid_command(name='импорт_игроков')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(file="CSV или JSONL со списком игроков", replace="Полностью заменить текущий список")
+    async def import_roster_command(self, ctx, file: discord.Attachment, replace: bool = False):
+        """Загружает список верифицированных игроков из файла (только для администраторов)"""
+        # Сообщение с вложением не удаляем до чтения файла
+        await begin_command(ctx, defer=True, delete_message=False)
+        
+        try:
+            content = (await file.read()).decode('utf-8-sig')
+        except Exception as e:
+            print(f"❌ Ошибка чтения файла импорта: {e}")
+            await safe_send_message(ctx, "❌ Не удалось прочитать файл (нужна кодировка UTF-8).", delete_after=15)
+            return
+        
+        imported = {}
+        errors = []
+        for line_no, row in parse_roster(file.filename, content):
+            user_id, info, error = validate_roster_row(row)
+            if error:
+                errors.append(f"строка {line_no}: {error}")
+            else:
+                imported[user_id] = info
+        
+        # Полная замена только по полностью корректному файлу: иначе неудачная
+        # загрузка стерла бы весь список, и пустой список ушел бы в хранилище
+        if replace and (errors or not imported):
+            reason = f"ошибок в файле: {len(errors)}" if errors else "в файле нет записей"
+            shown = "\n".join(errors[:10])
+            await safe_send_message(
+                ctx, f"❌ Замена списка отменена ({reason}), текущий список не изменен.\n{shown}"[:2000],
+                delete_after=60
+            )
+            print(f"⚠️ Импорт игроков с заменой отменен: {reason}")
+            return
+        
+        # Список меняется только у этого сервера
+        if replace:
+            for user_id in guild_players(ctx.guild.id):
+                del verified_players[(ctx.guild.id, user_id)]
+        verified_players.update(((ctx.guild.id, user_id), info) for user_id, info in imported.items())
+        save_state()
+        if FULL_MEMBER_CACHE:
+            self.compliance.seed(ctx.guild)
+        
+        embed = discord.Embed(
+            title="📥 Импорт игроков завершен",
+            description=f"**Загружено:** {len(imported)}\n"
+                       f"**С ошибками:** {len(errors)}\n"
+                       f"**Всего верифицированных:** {len(guild_players(ctx.guild.id))}\n\n"
+                       f"Роли не меняются — запустите `!синхронизация_ролей`, чтобы выдать их.",
+            color=0x00ff00 if not errors else 0xffa500
+        )
+        if errors:
+            shown = "\n".join(errors[:10])
+            if len(errors) > 10:
+                shown += f"\n... и еще {len(errors) - 10}"
+            embed.add_field(name="⚠️ Ошибки", value=shown[:1024], inline=False)
+        
+        await safe_send_message(ctx, embed=embed)
+        print(f"📥 Импорт игроков: загружено {len(imported)}, ошибок {len(errors)}")
+
+    @commands.hybrid_command(name='синхронизация_ролей')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    async def sync_roles_command(self, ctx):
+        """Приводит роль верификации в соответствие со списком игроков (только для администраторов)"""
+        await begin_command(ctx, defer=True)
+        guild = ctx.guild
+        
+        if guild.id in role_sync_running:
+            await safe_send_message(ctx, "❌ Синхронизация уже выполняется.", delete_after=10)
+            return
+        
+        role = guild.get_role(guild_config(guild.id).verified_role_id)
+        if not role:
+            await safe_send_message(ctx, "❌ Роль верификации не найдена!", delete_after=10)
+            return
+        
+        role_sync_running.add(guild.id)
+        started_at = time.monotonic()
+        
+        try:
+            status = await safe_send_message(ctx, embed=build_role_sync_embed("сбор данных", 0, 0, 0, 0, started_at))
+            
+            # План считается по фактическим ролям, поэтому прерванную синхронизацию
+            # можно просто запустить заново — уже сделанные изменения не повторятся
+            to_add, to_remove = await plan_role_sync(guild, role)
+            operations = [(safe_add_roles, member) for member in to_add] + [(safe_remove_roles, member) for member in to_remove]
+            total = len(operations)
+            semaphore = asyncio.Semaphore(ROLE_SYNC_CONCURRENCY)
+            added = removed = failed = 0
+            
+            async def run_operation(operation, member):
+                async with semaphore:
+                    # Блокировка участника не дает снять роль, которую !verify только что выдал
+                    try:
+                        async with member_locks.hold(guild.id, member.id, timeout=LOCK_TIMEOUT_SECONDS):
+                            # План мог устареть, пока ждали очередь
+                            if ((guild.id, member.id) in verified_players) != (operation is safe_add_roles):
+                                return operation, None
+                            return operation, await operation(member, role)
+                    except asyncio.TimeoutError:
+                        print(f"⚠️ Не дождались очереди на изменение ролей {member.name}")
+                        return operation, False
+            
+            for i in range(0, len(operations), ROLE_SYNC_BATCH_SIZE):
+                batch = operations[i:i + ROLE_SYNC_BATCH_SIZE]
+                for operation, success in await asyncio.gather(*(run_operation(op, member) for op, member in batch)):
+                    if success is None:
+                        total -= 1
+                    elif not success:
+                        failed += 1
+                    elif operation is safe_add_roles:
+                        added += 1
+                    else:
+                        removed += 1
+                
+                if status:
+                    try:
+                        await status.edit(embed=build_role_sync_embed("выполняется", added, removed, failed, total, started_at))
+                    except Exception as e:
+                        print(f"⚠️ Не удалось обновить прогресс синхронизации: {e}")
+            
+            embed = build_role_sync_embed("завершена", added, removed, failed, total, started_at)
+            if status:
+                await status.edit(embed=embed)
+            else:
+                await safe_send_message(ctx, embed=embed)
+            
+            print(f"🔄 Синхронизация ролей: выдано {added}, снято {removed}, ошибок {failed}")
+        except Exception as e:
+            print(f"❌ Ошибка синхронизации ролей: {e}")
+            await safe_send_message(ctx, "❌ Синхронизация прервана из-за ошибки. Ее можно запустить повторно.", delete_after=30)
+        finally:
+            role_sync_running.discard(guild.id)
+
+    # ---------- соответствие ников ----------
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Пересчитывает участника, когда меняется его ник на сервере"""
+        try:
+            if before.display_name != after.display_name and (after.guild.id, after.id) in verified_players:
+                self.compliance.check(after.guild.id, after.id, after.display_name)
+        except Exception as e:
+            print(f"❌ Ошибка проверки ника: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.compliance.forget(member.guild.id, member.id)
+
+    @commands.hybrid_command(name='ники')
+    @commands.has_permissions(administrator=True)
+    @app_commands.default_permissions(administrator=True)
+    async def nickname_report_command(self, ctx):
+        """Верифицированные участники с ником не по формату (только для администраторов)"""
+        await begin_command(ctx)
+        
+        if not FULL_MEMBER_CACHE:
+            await safe_send_message(
+                ctx, f"⚠️ Проверка ников работает только с полным кэшем участников "
+                     f"(сейчас MEMBER_CACHE_POLICY={MEMBER_CACHE_POLICY}).",
+                delete_after=30
+            )
+            return
+        
+        rows = self.compliance.report(ctx.guild.id)
+        lines = [
+            f"• <@{user_id}> `{display_name}` → `{expected}`"
+            for user_id, display_name, expected in rows[:NICKNAME_REPORT_SHOWN]
+        ]
+        if len(rows) > NICKNAME_REPORT_SHOWN:
+            lines.append(f"... и еще {len(rows) - NICKNAME_REPORT_SHOWN}")
+        
+        embed = discord.Embed(
+            title=f"📛 Ники не по формату: {len(rows)}",
+            description="\n".join(lines) if lines else "*Все верифицированные участники с правильным ником*",
+            color=0xffa500 if rows else 0x00ff00
+        )
+        reminders = f"раз в {NICKNAME_REMINDER_HOURS} ч" if NICKNAME_REMINDER_HOURS > 0 else "выключены"
+        embed.set_footer(text=f"Напоминания в ЛС: {reminders}")
+        await safe_send_message(ctx, embed=embed, delete_after=120)
+
+    async def send_nickname_reminders(self, guild):
+        """Отправляет одну пачку напоминаний в ЛС с паузой между сообщениями"""
+        now = int(time.time())
+        due = self.compliance.due_reminders(guild.id, now, NICKNAME_REMINDER_BATCH_SIZE)
+        members = await resolve_members(guild, due)
+        sent = 0
+        
+        for user_id in due:
+            # Время отмечаем и при ошибке: закрытые ЛС не должны запрашиваться каждый запуск
+            self.compliance.reminded[(guild.id, user_id)] = now
+            member = members.get(user_id)
+            if member is None:
+                continue
+            try:
+                embed = build_nickname_dm_embed(guild.name, verified_players[(guild.id, user_id)].server_nickname)
+                await member.send("🔔 Напоминание: ваш ник на сервере не соответствует формату клана.", embed=embed)
+                sent += 1
+            except Exception as e:
+                print(f"⚠️ Не удалось отправить напоминание о нике {member.name}: {e}")
+            await asyncio.sleep(NICKNAME_REMINDER_DELAY_SECONDS)
+        
+        return sent
+
+    @tasks.loop(hours=24)
+    async def nickname_reminder_task(self):
+        """Напоминает о нике участникам, которые так и не сменили его"""
+        for guild in self.bot.guilds:
+            try:
+                sent = await self.send_nickname_reminders(guild)
+                if sent:
+                    print(f"📛 Напоминания о нике на {guild.name}: отправлено {sent}")
+            except Exception as e:
+                print(f"❌ Ошибка напоминаний о нике на {guild.name}: {e}")
+
+    @nickname_reminder_task.before_loop
+    async def before_nickname_reminders(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot):
+    await bot.add_cog(Verification(bot))
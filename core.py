@@ -0,0 +1,698 @@
+"""Общее для всех расширений бота: конфигурация, реестры состояния и безопасные обертки над API.
+
+Этот модуль не перезагружается вместе с расширениями, поэтому реестры
+и кэши в нем переживают перезагрузку cog'ов без потери данных.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+
+import aiohttp
+import discord
+
+from guild_config import ConfigRegistry, build_guild_config, config_signature, load_registry
+from records import STATE_VERSION, member_key, migrate_state, record_from_dict, record_to_dict
+
+# КОНФИГУРАЦИЯ
+# Встроенные настройки сервера; файл GUILD_CONFIG_FILE, если он есть, их заменяет
+# (см. guild_config.py), и тогда эти значения не используются
+DEFAULT_GUILD_CONFIG = {
+    "trigger_channels": {
+        "дуо": 1439645769744519260,
+        "сквад": 1439645855756845218,
+        "соло": 1439645659882848316,
+        "группа": 1439644602847072417,
+        "митинг": 1439645198891225210,
+        "кино": 1439645357566066818,
+    },
+    "player_search_channel_id": 1439646366899896360,
+    "vacation": {
+        "request_channel_id": 1439646602104016896,
+        "admin_channel_id": 1439646172053635275,
+        "vacation_role_id": 1439648201173897357,
+    },
+    # Конфигурация верификации
+    "verification": {
+        "verified_role_id": 1439646749550575636,
+        "verification_channel_id": 1439572596361527448,
+    },
+    # Шаблоны для временных каналов
+    "channel_templates": {
+        "сквад": {"name": "🔹Сквад {}", "user_limit": 4, "category_name": "🔊 Временные каналы"},
+        "дуо": {"name": "👥Дуо {}", "user_limit": 2, "category_name": "🔊 Временные каналы"},
+        "соло": {"name": "👤Соло {}", "user_limit": 1, "category_name": "🔊 Временные каналы"},
+        "группа": {"name": "👾Другие игры {}", "user_limit": 8, "category_name": "🔊 Временные каналы"},
+        "митинг": {"name": "🗣️Говорилка {}", "user_limit": 0, "category_name": "🔊 Временные каналы"},
+        "кино": {"name": "🎬Кино {}", "user_limit": 0, "category_name": "🔊 Временные каналы"}
+    },
+}
+
+# Кэши для оптимизации
+active_temp_channels = {}
+active_searches = {}
+search_boards = {}
+# Отпуска и верифицированные игроки — по (guild_id, user_id)
+active_vacations = {}
+verified_players = {}
+# Верификации из хранилища до версии 3, еще не отнесенные ни к одному серверу: user_id -> запись
+unclaimed_verified = {}
+cooldowns = {}
+
+# Настройки
+STATE_FILE = os.getenv('BOT_STATE_FILE', 'bot_state.json')
+GUILD_CONFIG_FILE = os.getenv('BOT_GUILD_CONFIG', 'guild_config.json')
+SNAPSHOT_FILE = os.getenv('BOT_SNAPSHOT_FILE', 'bot_snapshot.jsonl')
+SNAPSHOT_VERSION = 2
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('BOT_SNAPSHOT_MAX_AGE', '900'))
+SNAPSHOT_COOLDOWN_SECONDS = 300
+LOCK_STRIPES = 256
+LOCK_TIMEOUT_SECONDS = 15
+MEMBER_LRU_SIZE = 256
+
+# Политика кэширования участников:
+# full — кэшировать всех (загрузка всех участников при старте)
+# voice — кэшировать только участников в голосовых каналах, без загрузки при старте
+# none — не кэшировать участников, всё подгружается по требованию
+MEMBER_CACHE_POLICIES = ('full', 'voice', 'none')
+MEMBER_CACHE_POLICY = os.getenv('MEMBER_CACHE_POLICY', 'full')
+if MEMBER_CACHE_POLICY not in MEMBER_CACHE_POLICIES:
+    raise ValueError(f"MEMBER_CACHE_POLICY={MEMBER_CACHE_POLICY!r}: допустимо {', '.join(MEMBER_CACHE_POLICIES)}")
+# Только при полном кэше guild.members содержит всех, а on_member_update приходит для каждого участника
+FULL_MEMBER_CACHE = MEMBER_CACHE_POLICY == 'full'
+RETRY_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 5
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+# Состояние, которое расширение передает своей новой версии при перезагрузке
+handover = {}
+
+def take_handover(key, factory):
+    """Забирает состояние, оставленное прежней версией расширения, или создает новое"""
+    if key in handover:
+        return handover.pop(key)
+    return factory()
+
+# ==================== НАСТРОЙКИ СЕРВЕРОВ ====================
+
+def load_guild_configs():
+    """Реестр настроек при запуске; ошибка в файле не мешает запуститься со встроенными"""
+    try:
+        return load_registry(GUILD_CONFIG_FILE, DEFAULT_GUILD_CONFIG)
+    except Exception as e:
+        print(f"❌ Ошибка в файле настроек {GUILD_CONFIG_FILE}, используются встроенные: {e}")
+        # Подпись файла запоминаем, чтобы перечитать его только после исправления
+        return ConfigRegistry(
+            guilds=MappingProxyType({}),
+            default=build_guild_config(DEFAULT_GUILD_CONFIG),
+            signature=config_signature(GUILD_CONFIG_FILE),
+        )
+
+guild_configs = load_guild_configs()
+rejected_config_signature = None
+
+def guild_config(guild_id):
+    """Настройки сервера; обработчик берет их один раз и дальше работает с этим объектом"""
+    return guild_configs.for_guild(guild_id)
+
+async def reload_guild_configs(force=False):
+    """Перечитывает файл настроек, если он изменился, и заменяет реестр одним присваиванием.
+    
+    Возвращает True, если реестр заменен. При ошибке в файле остается прежний
+    реестр, а тот же вариант файла повторно не разбирается.
+    """
+    global guild_configs, rejected_config_signature
+    signature = config_signature(GUILD_CONFIG_FILE)
+    if not force and (signature == guild_configs.signature or
+                      (rejected_config_signature is not None and signature == rejected_config_signature)):
+        return False
+    
+    try:
+        registry = await asyncio.to_thread(load_registry, GUILD_CONFIG_FILE, DEFAULT_GUILD_CONFIG)
+    except Exception:
+        rejected_config_signature = signature
+        raise
+    
+    guild_configs = registry
+    rejected_config_signature = None
+    return True
+
+# ==================== ЛЕНИВАЯ ЗАГРУЗКА УЧАСТНИКОВ ====================
+
+class MemberLRU:
+    """Небольшой LRU-кэш участников, подгруженных по требованию"""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.members = OrderedDict()
+    
+    def get(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        member = self.members.get(key)
+        if member:
+            self.members.move_to_end(key)
+        return member
+    
+    def put(self, member):
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        if len(self.members) > self.max_size:
+            self.members.popitem(last=False)
+
+member_lru = MemberLRU(MEMBER_LRU_SIZE)
+
+async def resolve_members(guild, user_ids):
+    """Возвращает участников по ID: кэш discord.py, затем LRU, затем пакетный запрос"""
+    found = {}
+    missing = []
+    
+    for user_id in user_ids:
+        member = guild.get_member(user_id) or member_lru.get(guild.id, user_id)
+        if member:
+            found[user_id] = member
+        else:
+            missing.append(user_id)
+    
+    # Один запрос через gateway на каждые 100 недостающих участников
+    for i in range(0, len(missing), 100):
+        batch = missing[i:i + 100]
+        try:
+            members = await guild.query_members(user_ids=batch, limit=len(batch), cache=False)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки участников: {e}")
+            continue
+        
+        for member in members:
+            member_lru.put(member)
+            found[member.id] = member
+    
+    return found
+
+def voice_member_ids(channel):
+    """ID участников голосового канала по голосовым состояниям — не зависит от кэша участников"""
+    return list(channel.voice_states)
+
+def get_rss_mb():
+    """Текущий объем резидентной памяти процесса в МБ"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# ==================== ХРАНИЛИЩЕ СОСТОЯНИЯ ====================
+
+def save_state():
+    """Сохраняет отпуска и поиски на диск"""
+    state = {
+        'version': STATE_VERSION,
+        'vacations': {
+            member_key(*key): record_to_dict(record)
+            for key, record in active_vacations.items()
+        },
+        'searches': {
+            str(user_id): record_to_dict(record)
+            for user_id, record in active_searches.items()
+        },
+        'search_boards': {
+            str(guild_id): record_to_dict(record)
+            for guild_id, record in search_boards.items()
+        },
+        'verified': {
+            **{str(user_id): record_to_dict(record) for user_id, record in unclaimed_verified.items()},
+            **{member_key(*key): record_to_dict(record) for key, record in verified_players.items()},
+        },
+    }
+    
+    try:
+        tmp_path = f"{STATE_FILE}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, STATE_FILE)
+    except Exception as e:
+        print(f"❌ Ошибка сохранения состояния: {e}")
+
+def load_state():
+    """Загружает сохраненное состояние с диска"""
+    try:
+        with open(STATE_FILE, encoding='utf-8') as f:
+            return migrate_state(json.load(f))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"❌ Ошибка загрузки состояния: {e}")
+        return {}
+
+def load_record(record_type, data, key):
+    """Запись из хранилища или None: битая строка пропускается, а не срывает восстановление сервера"""
+    try:
+        return record_from_dict(record_type, data)
+    except (TypeError, ValueError, AttributeError) as e:
+        print(f"⚠️ Пропущена запись {record_type.__name__} {key}: {e}")
+        return None
+
+# ==================== СНИМОК ДЛЯ БЫСТРОГО ПЕРЕЗАПУСКА ====================
+
+# Раздел снимка -> (реестр, раздел состояния, как в load_state)
+SNAPSHOT_SECTIONS = {
+    'temp_channel': (active_temp_channels, 'temp_channels'),
+    'search': (active_searches, 'searches'),
+    'search_board': (search_boards, 'search_boards'),
+    'vacation': (active_vacations, 'vacations'),
+    'verified': (verified_players, 'verified'),
+    'verified_unclaimed': (unclaimed_verified, 'verified'),
+}
+
+def snapshot_key(key):
+    """Ключ реестра в виде строки, как в хранилище"""
+    return member_key(*key) if isinstance(key, tuple) else str(key)
+
+def write_snapshot(header=None):
+    """Записывает все реестры в JSON-lines: заголовок, затем одна запись на строку"""
+    now = time.time()
+    lines = [{'type': 'header', 'version': SNAPSHOT_VERSION, 'saved_at': int(now), **(header or {})}]
+    for section, (registry, _) in SNAPSHOT_SECTIONS.items():
+        lines.extend({'type': section, 'key': snapshot_key(key), **record_to_dict(record)} for key, record in registry.items())
+    
+    # Кулдауны короткие, старые нет смысла переносить
+    lines.extend(
+        {'type': 'cooldown', 'user_id': user_id, 'command': command, 'at': used_at}
+        for (user_id, command), used_at in cooldowns.items()
+        if now - used_at < SNAPSHOT_COOLDOWN_SECONDS
+    )
+    
+    try:
+        tmp_path = f"{SNAPSHOT_FILE}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, SNAPSHOT_FILE)
+        return len(lines) - 1
+    except Exception as e:
+        print(f"❌ Ошибка записи снимка: {e}")
+        return 0
+
+def load_snapshot():
+    """Читает снимок последней мягкой остановки; устаревший или поврежденный снимок игнорируется.
+    
+    Снимок одноразовый: после чтения файл удаляется, чтобы после аварийного
+    падения бот не поднял давно неактуальное состояние.
+    """
+    try:
+        with open(SNAPSHOT_FILE, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        os.remove(SNAPSHOT_FILE)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"❌ Ошибка чтения снимка: {e}")
+        return None
+    
+    header = lines[0] if lines and lines[0].get('type') == 'header' else {}
+    if header.get('version') != SNAPSHOT_VERSION:
+        print("⚠️ Снимок другой версии, используется обычное хранилище")
+        return None
+    
+    age = time.time() - header.get('saved_at', 0)
+    if age > SNAPSHOT_MAX_AGE_SECONDS:
+        print(f"⚠️ Снимок устарел ({age / 60:.0f} мин), используется обычное хранилище")
+        return None
+    
+    state = {'header': header, 'cooldowns': []}
+    sections = {section: state_key for section, (_, state_key) in SNAPSHOT_SECTIONS.items()}
+    for state_key in sections.values():
+        state[state_key] = {}
+    
+    for line in lines[1:]:
+        line_type = line.pop('type', None)
+        if line_type in sections:
+            state[sections[line_type]][str(line.pop('key'))] = line
+        elif line_type == 'cooldown':
+            state['cooldowns'].append(line)
+    
+    print(f"⚡ Загружен снимок возрастом {age:.0f} сек: записей {len(lines) - 1}")
+    return state
+
+def restore_cooldowns(saved_cooldowns):
+    """Возвращает кулдауны из снимка, чтобы перезапуск не сбрасывал ограничения"""
+    for item in saved_cooldowns:
+        cooldowns[(item['user_id'], item['command'])] = item['at']
+
+# ==================== НЕЗАВЕРШЕННЫЕ ЗАПРОСЫ ====================
+
+class InFlightWork:
+    """Считает незавершенные запросы к API, чтобы при остановке дождаться их"""
+    
+    def __init__(self):
+        self.accepting = True
+        self.active = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+    
+    def __enter__(self):
+        self.active += 1
+        self.idle.clear()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.active -= 1
+        if self.active == 0:
+            self.idle.set()
+    
+    async def drain(self, timeout):
+        """Ждет завершения запросов не дольше timeout; возвращает число оставшихся"""
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.active
+
+inflight = InFlightWork()
+
+# ==================== БЛОКИРОВКИ ПО УЧАСТНИКАМ И КАНАЛАМ ====================
+
+class StripedLocks:
+    """Фиксированный набор asyncio.Lock, ключ попадает в полосу по хэшу.
+    
+    Память не растет с числом участников, а разные ключи почти никогда не
+    делят полосу. Блокировка не реентерабельна: внутри одного hold() нельзя
+    брать второй ключ из того же набора.
+    """
+    
+    def __init__(self, stripes):
+        self.locks = [asyncio.Lock() for _ in range(stripes)]
+        self.contended = 0
+        self.timeouts = 0
+    
+    def lock_for(self, *key):
+        return self.locks[hash(key) % len(self.locks)]
+    
+    @asynccontextmanager
+    async def hold(self, *key, timeout=None):
+        """Захватывает полосу ключа; по истечении timeout бросает asyncio.TimeoutError"""
+        lock = self.lock_for(*key)
+        if lock.locked():
+            self.contended += 1
+        
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        
+        try:
+            yield
+        finally:
+            lock.release()
+
+# (сервер, участник) — команды и обработчики, меняющие состояние участника
+member_locks = StripedLocks(LOCK_STRIPES)
+# (сервер, канал) — создание и удаление временных каналов
+channel_locks = StripedLocks(LOCK_STRIPES)
+
+BUSY_MESSAGE = "⏳ Предыдущий запрос еще обрабатывается, попробуйте чуть позже."
+
+# ==================== УСТОЙЧИВЫЕ ВЫЗОВЫ DISCORD ====================
+
+# Классы ошибок: retry — сбой сети или таймаут до ответа Discord, повтор может помочь;
+# server и rate_limited — discord.py уже повторял запрос сам, маршрут считаем сбойным;
+# forbidden и not_found — ответ окончательный; error — ошибка запроса
+def classify_error(error):
+    """Класс ошибки вызова Discord API"""
+    if isinstance(error, discord.Forbidden):
+        return 'forbidden'
+    if isinstance(error, discord.NotFound):
+        return 'not_found'
+    if isinstance(error, discord.DiscordServerError):
+        return 'server'
+    if isinstance(error, discord.RateLimited):
+        return 'rate_limited'
+    if isinstance(error, discord.HTTPException):
+        return 'error'
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, OSError)):
+        return 'retry'
+    return 'error'
+
+# Классы, при которых маршрут считается сбойным
+BREAKER_FAILURES = ('retry', 'server', 'rate_limited')
+
+class DiscordUnavailable(Exception):
+    """Маршрут временно отключен автоматом после серии сбоев"""
+
+class CircuitBreaker:
+    """Автомат для одного маршрута: после серии сбоев вызовы сразу отклоняются.
+    
+    Через BREAKER_RESET_SECONDS пропускается один пробный вызов: успех
+    закрывает автомат, сбой снова открывает его.
+    """
+    
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+    
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.trial or time.monotonic() - self.opened_at < BREAKER_RESET_SECONDS:
+            return False
+        self.trial = True
+        return True
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+    
+    def release_trial(self):
+        """Вызов завершился без ответа Discord — следующий снова может стать пробным"""
+        self.trial = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self.trial = False
+        if self.opened_at is not None or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+# (маршрут, сервер) -> автомат; сбой Discord на одном маршруте не блокирует остальные
+breakers = {}
+
+async def discord_call(route, guild_id, call, attempts=RETRY_ATTEMPTS):
+    """Вызывает call() с повторами при сбоях сети и автоматом маршрута.
+    
+    Ответы 429 и 5xx discord.py уже повторяет сам, здесь повторяются только
+    обрывы соединения и таймауты. Между повторами — случайная пауза до
+    RETRY_BASE_SECONDS * 2^n, чтобы повторы многих обработчиков не приходили
+    в Discord одновременно. Остальные ошибки пробрасываются сразу.
+    """
+    breaker = breakers.get((route, guild_id))
+    if breaker is None:
+        breaker = breakers[(route, guild_id)] = CircuitBreaker()
+    
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise DiscordUnavailable(route)
+        try:
+            with inflight:
+                result = await call()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind in BREAKER_FAILURES:
+                breaker.record_failure()
+            elif isinstance(e, discord.HTTPException):
+                # Discord ответил на запрос — маршрут работает
+                breaker.record_success()
+            else:
+                # Ошибки в нашем коде автомат не трогают, но пробный вызов освобождают
+                breaker.release_trial()
+            if kind != 'retry' or attempt == attempts - 1:
+                raise
+            await asyncio.sleep(random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)))
+        except BaseException:
+            # Отмена задачи посреди вызова: без этого автомат остался бы закрыт для проб навсегда
+            breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+# ==================== ПРОВЕРКА ПРАВ БОТА ====================
+
+class GuildPermissionCache:
+    """Права бота и позиция его верхней роли по серверам.
+    
+    Сбрасывается событиями об изменении ролей сервера и самого бота
+    (обработчики в main_bot.py), а не пересчитывается на каждый вызов.
+    """
+    
+    def __init__(self):
+        self.guilds = {}
+    
+    def get(self, guild):
+        entry = self.guilds.get(guild.id)
+        if entry is None:
+            me = guild.me
+            entry = self.guilds[guild.id] = (me.guild_permissions, me.top_role.position)
+        return entry
+    
+    def role_error(self, role):
+        """Почему бот не может выдать или снять роль, или None"""
+        permissions, top_position = self.get(role.guild)
+        if role.position >= top_position:
+            return f"Роль {role.name} выше роли бота"
+        if not permissions.manage_roles:
+            return "У бота нет прав на управление ролями"
+        return None
+    
+    def invalidate(self, guild_id):
+        self.guilds.pop(guild_id, None)
+
+bot_permissions = GuildPermissionCache()
+
+async def check_bot_permissions(guild):
+    """Проверяет права бота на сервере"""
+    bot_permissions.invalidate(guild.id)
+    permissions, _ = bot_permissions.get(guild)
+    
+    required_permissions = {
+        'manage_roles': permissions.manage_roles,
+        'manage_channels': permissions.manage_channels,
+        'move_members': permissions.move_members,
+        'manage_nicknames': permissions.manage_nicknames,
+    }
+    
+    missing_permissions = [perm for perm, has_perm in required_permissions.items() if not has_perm]
+    
+    if missing_permissions:
+        print(f"⚠️ У бота отсутствуют права: {', '.join(missing_permissions)}")
+        return False
+    
+    print("✅ У бота есть все необходимые права")
+    return True
+
+async def change_role(member, role, add):
+    """Выдает или снимает роль с проверкой прав по кэшу и повторами при сбоях"""
+    action = "выдачи" if add else "снятия"
+    error = bot_permissions.role_error(role)
+    if error:
+        print(f"❌ {error}")
+        return False
+    
+    try:
+        await discord_call('roles', member.guild.id, lambda: member.add_roles(role) if add else member.remove_roles(role))
+        return True
+    except DiscordUnavailable:
+        print(f"⚠️ Discord недоступен, {action} роли {role.name} пропущено")
+    except Exception as e:
+        kind = classify_error(e)
+        if kind == 'forbidden':
+            # Кэш прав мог устареть — пересчитаем при следующем вызове
+            bot_permissions.invalidate(member.guild.id)
+            print(f"❌ Недостаточно прав для {action} роли {role.name}")
+        else:
+            print(f"❌ Ошибка {action} роли ({kind}): {e}")
+    return False
+
+async def safe_add_roles(member, role):
+    """Безопасное добавление роли с проверкой прав"""
+    if await change_role(member, role, add=True):
+        print(f"✅ Роль {role.name} выдана пользователю {member.name}")
+        return True
+    return False
+
+async def safe_remove_roles(member, role):
+    """Безопасное снятие роли с проверкой прав"""
+    if await change_role(member, role, add=False):
+        print(f"✅ Роль {role.name} снята с пользователя {member.name}")
+        return True
+    return False
+
+# ==================== ОПТИМИЗАЦИЯ ПРОИЗВОДИТЕЛЬНОСТИ ====================
+
+def check_cooldown(user_id: int, command: str, cooldown_seconds: int = 3) -> bool:
+    """Проверка кд на команды"""
+    current_time = time.time()
+    key = (user_id, command)
+    
+    if key in cooldowns:
+        if current_time - cooldowns[key] < cooldown_seconds:
+            return False
+    
+    cooldowns[key] = current_time
+    return True
+
+async def command_cooldown(ctx, command: str, cooldown_seconds: int = 3) -> bool:
+    """Проверка кд для команды; на слэш-команду обязательно нужно ответить"""
+    if check_cooldown(ctx.author.id, command, cooldown_seconds):
+        return True
+    
+    if ctx.interaction:
+        await safe_send_message(ctx, "⏳ Подождите немного перед повторным использованием команды.")
+    return False
+
+async def begin_command(ctx, defer=False, ephemeral=True, delete_message=True):
+    """Удаляет сообщение с префикс-командой или откладывает ответ на слэш-команду"""
+    if ctx.interaction:
+        if defer:
+            try:
+                await ctx.defer(ephemeral=ephemeral)
+            except Exception as e:
+                print(f"❌ Ошибка при откладывании ответа: {e}")
+    elif delete_message:
+        await safe_delete_message(ctx.message)
+
+def guild_id_of(target):
+    guild = getattr(target, 'guild', None)
+    return guild.id if guild else 0
+
+async def safe_delete_message(message):
+    """Безопасное удаление сообщения; уже удаленное сообщение ошибкой не считается"""
+    try:
+        await discord_call('messages.delete', guild_id_of(message), message.delete)
+    except Exception as e:
+        kind = classify_error(e)
+        if kind not in ('not_found', 'forbidden'):
+            print(f"⚠️ Не удалось удалить сообщение ({kind}): {e}")
+
+async def safe_delete_channel(channel):
+    """Безопасное удаление канала"""
+    try:
+        await discord_call('channels.delete', guild_id_of(channel), channel.delete)
+        return True
+    except Exception as e:
+        if classify_error(e) == 'not_found':
+            return True
+        print(f"❌ Ошибка удаления канала {channel.name} ({classify_error(e)}): {e}")
+        return False
+
+async def safe_send_message(ctx, content=None, embed=None, delete_after=None, view=None, ephemeral=True, file=None):
+    """Безопасная отправка сообщения с обработкой ошибок"""
+    # Эфемерный ответ на слэш-команду не нужно удалять отдельным запросом
+    if ctx.interaction and ephemeral:
+        delete_after = None
+    
+    # Отправка не идемпотентна: после таймаута сообщение могло уйти, поэтому
+    # повтор только один. Вложение читается при отправке и повторно не уходит,
+    # а ответ на взаимодействие повтором можно только задвоить или опоздать с ним
+    attempts = 1 if file or ctx.interaction else 2
+    try:
+        return await discord_call(
+            'messages.send', guild_id_of(ctx),
+            lambda: ctx.send(content=content, embed=embed, delete_after=delete_after, view=view, ephemeral=ephemeral, file=file),
+            attempts=attempts
+        )
+    except Exception as e:
+        print(f"❌ Ошибка отправки сообщения ({classify_error(e)}): {e}")
+        return None
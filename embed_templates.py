@@ -0,0 +1,36 @@
+"""Реестр статичных embed: собираются один раз при импорте расширения.
+
+get() отдает один и тот же объект: отправка его не меняет, а обработчики
+только отправляют его и не изменяют. Embed с данными пользователя
+собираются в обработчиках f-строками — по замерам benchmarks/bench_templates.py
+это быстрее любого заполнения шаблона без генерации кода.
+"""
+import discord
+
+
+class EmbedTemplates:
+    """Готовые статичные embed по имени"""
+
+    def __init__(self):
+        self.static = {}
+
+    def register(self, name, title=None, description=None, color=None, fields=(), footer=None):
+        """Собирает статичный embed"""
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            colour=discord.Colour(color) if color is not None else None,
+        )
+        for field_name, value, inline in fields:
+            embed.add_field(name=field_name, value=value, inline=bool(inline))
+        if footer is not None:
+            embed.set_footer(text=footer)
+        self.static[name] = embed
+
+    def get(self, name):
+        """Готовый embed — общий объект только для отправки, изменять его нельзя"""
+        return self.static[name]
+
+
+# Общий реестр; расширения регистрируют свои шаблоны при импорте
+embed_templates = EmbedTemplates()
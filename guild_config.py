@@ -0,0 +1,159 @@
+"""Настройки серверов: JSON-файл -> неизменяемый реестр с готовыми индексами.
+
+Модуль не зависит от discord.py. Реестр собирается целиком и после сборки не
+меняется: обработчик берет настройки своего сервера один раз и работает с
+согласованным набором, даже если файл в это время перечитали.
+
+Формат файла:
+
+    {
+        "default": {...},
+        "guilds": {"<guild_id>": {...}}
+    }
+
+Настройки сервера накладываются на "default" (вложенные разделы — по ключам).
+Сервер без записи и без "default" получает пустые настройки: без триггер-каналов
+и с ID 0, то есть функции бота на нем просто не срабатывают.
+"""
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+
+SECTIONS = ('trigger_channels', 'vacation', 'verification', 'channel_templates')
+
+
+@dataclass(frozen=True, slots=True)
+class ChannelTemplate:
+    """Шаблон временного канала; prefix — по нему канал узнается после перезапуска"""
+    name: str
+    user_limit: int
+    category_name: str
+    prefix: str
+
+
+@dataclass(frozen=True, slots=True)
+class GuildConfig:
+    """Настройки одного сервера"""
+    trigger_channels: MappingProxyType
+    trigger_types: MappingProxyType
+    channel_templates: MappingProxyType
+    category_names: frozenset
+    type_order: MappingProxyType
+    player_search_channel_id: int
+    vacation_request_channel_id: int
+    vacation_admin_channel_id: int
+    vacation_role_id: int
+    verified_role_id: int
+    verification_channel_id: int
+
+    def template_type(self, channel_name):
+        """Тип временного канала по названию или None"""
+        for channel_type, template in self.channel_templates.items():
+            if channel_name.startswith(template.prefix):
+                return channel_type
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigRegistry:
+    """Настройки всех серверов; signature — по ней видно, что файл изменился"""
+    guilds: MappingProxyType
+    default: GuildConfig
+    signature: tuple
+
+    def for_guild(self, guild_id):
+        return self.guilds.get(guild_id, self.default)
+
+
+def read_id(data, key):
+    value = data.get(key, 0)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f"{key}: ожидается ID, получено {value!r}")
+    return value
+
+
+def build_guild_config(data):
+    """Проверяет настройки сервера и собирает индексы"""
+    templates = {}
+    for channel_type, template in data.get('channel_templates', {}).items():
+        name = template.get('name', '')
+        if '{}' not in name:
+            raise ValueError(f"channel_templates.{channel_type}: в name нужен {{}} для номера канала")
+        user_limit = template.get('user_limit', 0)
+        if not isinstance(user_limit, int) or not 0 <= user_limit <= 99:
+            raise ValueError(f"channel_templates.{channel_type}: user_limit должен быть от 0 до 99")
+        templates[channel_type] = ChannelTemplate(
+            name=name,
+            user_limit=user_limit,
+            category_name=template.get('category_name', "🔊 Временные каналы"),
+            prefix=name.split(" ")[0],
+        )
+
+    triggers = {}
+    for channel_type in data.get('trigger_channels', {}):
+        if channel_type not in templates:
+            raise ValueError(f"trigger_channels.{channel_type}: нет шаблона канала этого типа")
+        triggers[channel_type] = read_id(data['trigger_channels'], channel_type)
+
+    vacation = data.get('vacation', {})
+    verification = data.get('verification', {})
+    return GuildConfig(
+        trigger_channels=MappingProxyType(triggers),
+        trigger_types=MappingProxyType({channel_id: channel_type for channel_type, channel_id in triggers.items()}),
+        channel_templates=MappingProxyType(templates),
+        category_names=frozenset(template.category_name for template in templates.values()),
+        type_order=MappingProxyType({channel_type: index for index, channel_type in enumerate(templates)}),
+        player_search_channel_id=read_id(data, 'player_search_channel_id'),
+        vacation_request_channel_id=read_id(vacation, 'request_channel_id'),
+        vacation_admin_channel_id=read_id(vacation, 'admin_channel_id'),
+        vacation_role_id=read_id(vacation, 'vacation_role_id'),
+        verified_role_id=read_id(verification, 'verified_role_id'),
+        verification_channel_id=read_id(verification, 'verification_channel_id'),
+    )
+
+
+def merge_config(base, override):
+    """Накладывает настройки сервера на общие; разделы объединяются по ключам"""
+    merged = {**base, **override}
+    for section in SECTIONS:
+        if isinstance(base.get(section), dict) and isinstance(override.get(section), dict):
+            merged[section] = {**base[section], **override[section]}
+    return merged
+
+
+def config_signature(path):
+    """Время изменения и размер файла, None — файла нет"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_registry(path, fallback):
+    """Читает файл настроек; без файла fallback действует для всех серверов.
+
+    Ошибка в файле выбрасывает ValueError с указанием сервера и ключа.
+    """
+    signature = config_signature(path)
+    if signature is None:
+        return ConfigRegistry(guilds=MappingProxyType({}), default=build_guild_config(fallback), signature=None)
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    base = data.get('default', {})
+    guilds = {}
+    for guild_id, guild_data in data.get('guilds', {}).items():
+        try:
+            guilds[int(guild_id)] = build_guild_config(merge_config(base, guild_data))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"сервер {guild_id}: {e}") from e
+
+    try:
+        default = build_guild_config(base)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"default: {e}") from e
+
+    return ConfigRegistry(guilds=MappingProxyType(guilds), default=default, signature=signature)
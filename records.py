@@ -0,0 +1,128 @@
+"""Компактные записи для реестров состояния бота.
+
+Записи хранят только ID и время в секундах epoch вместо объектов discord.py
+и datetime, а __slots__ убирает словарь атрибутов у каждой записи.
+"""
+from dataclasses import asdict, dataclass, field, fields
+
+# Версия формата хранилища; файлы без версии — формат до компактных записей
+STATE_VERSION = 3
+
+
+@dataclass(slots=True)
+class TempChannelRecord:
+    """Временный голосовой канал"""
+    channel_type: str
+    created_by: int
+    created_at: int
+
+
+@dataclass(slots=True)
+class VacationRecord:
+    """Активный отпуск участника"""
+    guild_id: int
+    end_at: int
+    admin_message_id: int
+    duration: str
+
+
+@dataclass(slots=True)
+class VerifiedPlayer:
+    """Верифицированный игрок"""
+    pubg_nickname: str
+    real_name: str
+    verified_at: int
+    discord_name: str
+    server_nickname: str
+    nickname_updated: int = 0
+
+
+@dataclass(slots=True)
+class SearchRecord:
+    """Активный поиск игроков; сам View в реестре не хранится"""
+    guild_id: int
+    author_id: int
+    voice_channel_id: int
+    channel_id: int
+    message_id: int
+    search_text: str
+    author_avatar_url: str = ""
+    joined_users: set = field(default_factory=set)
+    last_update: int = 0
+
+
+@dataclass(slots=True)
+class SearchBoardRecord:
+    """Сообщения доски поиска на сервере, по порядку страниц"""
+    channel_id: int
+    message_ids: list = field(default_factory=list)
+
+
+def record_to_dict(record):
+    """Запись в виде словаря для JSON"""
+    data = asdict(record)
+    for key, value in data.items():
+        if isinstance(value, set):
+            data[key] = list(value)
+    return data
+
+
+def record_from_dict(record_type, data):
+    """Создает запись из словаря, игнорируя лишние ключи"""
+    values = {}
+    for record_field in fields(record_type):
+        if record_field.name in data:
+            value = data[record_field.name]
+            values[record_field.name] = set(value) if record_field.name == 'joined_users' else value
+    return record_type(**values)
+
+
+def member_key(guild_id, user_id):
+    """Ключ записи участника в хранилище: 'guild_id:user_id'"""
+    return f"{guild_id}:{user_id}"
+
+
+def parse_member_key(key):
+    """(guild_id, user_id) из ключа хранилища или None для ключа без сервера (до версии 3)"""
+    guild_id, separator, user_id = key.partition(':')
+    if not separator:
+        return None
+    return int(guild_id), int(user_id)
+
+
+def migrate_state(state):
+    """Приводит хранилище старого формата к полям записей.
+
+    В версии 1 отпуск хранил окончание в end_date, поиск не хранил author_id
+    (автор был только ключом), а время верификации было дробным.
+    До версии 3 отпуска и верифицированные игроки хранились по ID участника
+    без сервера. Отпуск знает свой сервер и получает ключ сразу; у записи
+    верификации сервера нет, ее ключ остается прежним, и сервер ее забирает
+    при восстановлении.
+    """
+    version = state.get('version', 1)
+    if version >= STATE_VERSION:
+        return state
+
+    if version < 2:
+        for info in state.get('vacations', {}).values():
+            if 'end_date' in info:
+                info.setdefault('end_at', int(info.pop('end_date')))
+            info.setdefault('admin_message_id', 0)
+
+        for user_id, info in state.get('searches', {}).items():
+            info.setdefault('author_id', int(user_id))
+
+        for info in state.get('verified', {}).values():
+            for key in ('verified_at', 'nickname_updated'):
+                if isinstance(info.get(key), float):
+                    info[key] = int(info[key])
+
+    if 'vacations' in state:
+        state['vacations'] = {
+            member_key(info.get('guild_id', 0), user_id): info
+            for user_id, info in state['vacations'].items()
+        }
+
+    state['version'] = STATE_VERSION
+    return state
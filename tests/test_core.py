@@ -0,0 +1,208 @@
+import asyncio
+
+import discord
+import pytest
+
+import core
+from core import CircuitBreaker, DiscordUnavailable, StripedLocks, classify_error, discord_call
+from records import VacationRecord, VerifiedPlayer
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(core, 'RETRY_BASE_SECONDS', 0)
+    monkeypatch.setattr(core, 'breakers', {})
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "test"
+
+
+def http_error(error_type, status):
+    return error_type(FakeResponse(status), "test")
+
+
+# ---------- StripedLocks ----------
+
+def test_same_key_same_stripe():
+    locks = StripedLocks(16)
+    assert locks.lock_for(1, 2) is locks.lock_for(1, 2)
+
+
+def test_hold_timeout_counts():
+    async def scenario():
+        locks = StripedLocks(4)
+        async with locks.hold(1, 2):
+            with pytest.raises(asyncio.TimeoutError):
+                async with locks.hold(1, 2, timeout=0.01):
+                    pass
+        # После выхода полоса свободна
+        async with locks.hold(1, 2, timeout=0.01):
+            pass
+        return locks
+
+    locks = asyncio.run(scenario())
+    assert locks.timeouts == 1
+    assert locks.contended == 1
+
+
+def test_hold_serializes_same_key():
+    order = []
+
+    async def worker(locks, name):
+        async with locks.hold('key'):
+            order.append(f"{name}+")
+            await asyncio.sleep(0)
+            order.append(f"{name}-")
+
+    async def scenario():
+        locks = StripedLocks(4)
+        await asyncio.gather(worker(locks, 'a'), worker(locks, 'b'))
+
+    asyncio.run(scenario())
+    assert order == ['a+', 'a-', 'b+', 'b-']
+
+
+# ---------- CircuitBreaker ----------
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker()
+    for _ in range(core.BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_breaker_trial_call(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(core.time, 'monotonic', lambda: clock[0])
+    breaker = CircuitBreaker()
+    for _ in range(core.BREAKER_FAILURE_THRESHOLD):
+        breaker.record_failure()
+
+    clock[0] += core.BREAKER_RESET_SECONDS
+    # Пропускается ровно один пробный вызов
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # Сбой пробного вызова снова открывает автомат
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock[0] += core.BREAKER_RESET_SECONDS
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.opened_at is None
+
+
+# ---------- discord_call ----------
+
+def run_call(error, attempts=3):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise error
+
+    async def scenario():
+        with pytest.raises(type(error)):
+            await discord_call('test', 1, call, attempts=attempts)
+
+    asyncio.run(scenario())
+    return len(calls), core.breakers[('test', 1)]
+
+
+def test_classify_error():
+    assert classify_error(http_error(discord.Forbidden, 403)) == 'forbidden'
+    assert classify_error(http_error(discord.NotFound, 404)) == 'not_found'
+    assert classify_error(http_error(discord.DiscordServerError, 503)) == 'server'
+    assert classify_error(discord.RateLimited(60)) == 'rate_limited'
+    assert classify_error(http_error(discord.HTTPException, 400)) == 'error'
+    assert classify_error(asyncio.TimeoutError()) == 'retry'
+    assert classify_error(KeyError()) == 'error'
+
+
+def test_network_errors_retried():
+    calls, breaker = run_call(asyncio.TimeoutError(), attempts=3)
+    assert calls == 3
+    assert breaker.failures == 3
+
+
+def test_server_error_not_retried():
+    calls, breaker = run_call(http_error(discord.DiscordServerError, 503))
+    assert calls == 1
+    assert breaker.failures == 1
+
+
+def test_discord_answer_closes_breaker():
+    core.breakers[('test', 1)] = CircuitBreaker()
+    core.breakers[('test', 1)].failures = 2
+    calls, breaker = run_call(http_error(discord.NotFound, 404))
+    assert calls == 1
+    assert breaker.failures == 0
+
+
+def test_own_errors_leave_breaker_alone():
+    core.breakers[('test', 1)] = CircuitBreaker()
+    core.breakers[('test', 1)].failures = 2
+    calls, breaker = run_call(KeyError('bug'))
+    assert calls == 1
+    assert breaker.failures == 2
+
+
+@pytest.mark.parametrize('error', [ValueError('bug'), discord.ClientException('bug'), asyncio.CancelledError()])
+def test_trial_released_without_discord_answer(monkeypatch, error):
+    clock = [1000.0]
+    monkeypatch.setattr(core.time, 'monotonic', lambda: clock[0])
+    for _ in range(core.BREAKER_FAILURE_THRESHOLD):
+        run_call(OSError('сеть'), attempts=1)
+    clock[0] += core.BREAKER_RESET_SECONDS
+
+    # Пробный вызов упал без ответа Discord — следующий снова пробный, а не отказ
+    run_call(error, attempts=1)
+    breaker = core.breakers[('test', 1)]
+    assert not breaker.trial
+    assert breaker.allow()
+
+
+def test_open_breaker_rejects_calls():
+    breaker = core.breakers[('test', 1)] = CircuitBreaker()
+    for _ in range(core.BREAKER_FAILURE_THRESHOLD):
+        breaker.record_failure()
+
+    async def call():
+        return 'ok'
+
+    with pytest.raises(DiscordUnavailable):
+        asyncio.run(discord_call('test', 1, call))
+
+
+def test_success_returns_result():
+    async def call():
+        return 'ok'
+
+    assert asyncio.run(discord_call('test', 1, call)) == 'ok'
+
+
+# ---------- снимок ----------
+
+def test_snapshot_keeps_guild_in_member_keys(monkeypatch, tmp_path):
+    monkeypatch.setattr(core, 'SNAPSHOT_FILE', str(tmp_path / 'snapshot.jsonl'))
+    vacation = VacationRecord(guild_id=1, end_at=1700000000, admin_message_id=0, duration="неделю")
+    player = VerifiedPlayer(
+        pubg_nickname="ProPlayer", real_name="Алексей", verified_at=1,
+        discord_name="player", server_nickname="ProPlayer (Алексей)",
+    )
+    monkeypatch.setitem(core.active_vacations, (1, 10), vacation)
+    monkeypatch.setitem(core.verified_players, (2, 10), player)
+    monkeypatch.setitem(core.unclaimed_verified, 30, player)
+
+    core.write_snapshot()
+    state = core.load_snapshot()
+
+    assert list(state['vacations']) == ['1:10']
+    assert sorted(state['verified']) == ['2:10', '30']
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from guild_config import load_registry, merge_config
+
+BASE = {
+    "trigger_channels": {"сквад": 100},
+    "player_search_channel_id": 200,
+    "vacation": {"admin_channel_id": 300, "vacation_role_id": 400},
+    "channel_templates": {
+        "сквад": {"name": "🔹Сквад {}", "user_limit": 4},
+        "дуо": {"name": "👥Дуо {}", "user_limit": 2, "category_name": "Дуо"},
+    },
+}
+
+
+def write_config(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_merge_config_merges_sections_by_key():
+    merged = merge_config(BASE, {"vacation": {"vacation_role_id": 401}, "player_search_channel_id": 201})
+
+    assert merged["vacation"] == {"admin_channel_id": 300, "vacation_role_id": 401}
+    assert merged["player_search_channel_id"] == 201
+    assert merged["trigger_channels"] is BASE["trigger_channels"]
+    assert BASE["vacation"]["vacation_role_id"] == 400
+
+
+def test_merge_config_replaces_non_dict_section():
+    assert merge_config(BASE, {"trigger_channels": None})["trigger_channels"] is None
+
+
+def test_load_registry_without_file_uses_fallback(tmp_path):
+    registry = load_registry(str(tmp_path / 'missing.json'), BASE)
+
+    assert registry.signature is None
+    assert registry.for_guild(1).trigger_types == {100: "сквад"}
+
+
+def test_load_registry_guild_override(tmp_path):
+    path = write_config(tmp_path / 'config.json', {
+        "default": BASE,
+        "guilds": {"42": {"trigger_channels": {"дуо": 500}, "vacation": {"vacation_role_id": 401}}},
+    })
+    registry = load_registry(path, {})
+    config = registry.for_guild(42)
+
+    assert config.trigger_types == {100: "сквад", 500: "дуо"}
+    assert config.vacation_role_id == 401
+    assert config.vacation_admin_channel_id == 300
+    assert config.type_order == {"сквад": 0, "дуо": 1}
+    assert config.category_names == {"🔊 Временные каналы", "Дуо"}
+    assert config.template_type("👥Дуо 3") == "дуо"
+    assert config.template_type("Общий") is None
+    assert registry.for_guild(7) is registry.default
+    assert registry.signature == (os.stat(path).st_mtime_ns, os.stat(path).st_size)
+
+
+def test_load_registry_reports_guild_and_key(tmp_path):
+    path = write_config(tmp_path / 'config.json', {
+        "default": BASE,
+        "guilds": {"42": {"vacation": {"vacation_role_id": "роль"}}},
+    })
+
+    with pytest.raises(ValueError, match="сервер 42: vacation_role_id"):
+        load_registry(path, {})
+
+
+def test_load_registry_rejects_trigger_without_template(tmp_path):
+    path = write_config(tmp_path / 'config.json', {"default": {**BASE, "trigger_channels": {"кино": 1}}})
+
+    with pytest.raises(ValueError, match="default: trigger_channels.кино"):
+        load_registry(path, {})
+
+
+def test_registry_is_read_only(tmp_path):
+    registry = load_registry(str(tmp_path / 'missing.json'), BASE)
+
+    with pytest.raises(TypeError):
+        registry.default.trigger_channels["дуо"] = 1
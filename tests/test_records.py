@@ -0,0 +1,82 @@
+import pytest
+
+from records import (
+    STATE_VERSION,
+    SearchRecord,
+    VacationRecord,
+    VerifiedPlayer,
+    member_key,
+    migrate_state,
+    parse_member_key,
+    record_from_dict,
+    record_to_dict,
+)
+
+
+def test_round_trip_converts_sets():
+    record = SearchRecord(
+        guild_id=1, author_id=2, voice_channel_id=3, channel_id=4, message_id=5,
+        search_text="ищем", joined_users={7, 8},
+    )
+    data = record_to_dict(record)
+
+    assert sorted(data['joined_users']) == [7, 8]
+    assert record_from_dict(SearchRecord, data) == record
+
+
+def test_extra_keys_ignored_and_defaults_applied():
+    data = {
+        'pubg_nickname': "ProPlayer", 'real_name': "Алексей", 'verified_at': 1,
+        'discord_name': "player", 'server_nickname': "ProPlayer (Алексей)", 'unknown': True,
+    }
+    assert record_from_dict(VerifiedPlayer, data).nickname_updated == 0
+
+
+def test_missing_field_raises():
+    with pytest.raises(TypeError):
+        record_from_dict(VacationRecord, {'guild_id': 1})
+
+
+def test_migrate_legacy_state():
+    state = migrate_state({
+        'vacations': {'10': {'guild_id': 1, 'end_date': 1700000000.5, 'admin_message_id': 5, 'duration': "неделю"}},
+        'searches': {'20': {
+            'guild_id': 1, 'voice_channel_id': 2, 'channel_id': 3, 'message_id': 4,
+            'search_text': "ищем", 'joined_users': [30],
+        }},
+        'verified': {'30': {
+            'pubg_nickname': "ProPlayer", 'real_name': "Алексей", 'verified_at': 1700000000.9,
+            'discord_name': "player", 'server_nickname': "ProPlayer (Алексей)",
+        }},
+    })
+
+    assert state['version'] == STATE_VERSION
+    vacation = record_from_dict(VacationRecord, state['vacations']['1:10'])
+    assert vacation.end_at == 1700000000
+    search = record_from_dict(SearchRecord, state['searches']['20'])
+    assert search.author_id == 20 and search.joined_users == {30}
+    assert record_from_dict(VerifiedPlayer, state['verified']['30']).verified_at == 1700000000
+
+
+def test_migrate_v2_keys_vacations_by_guild():
+    state = migrate_state({
+        'version': 2,
+        'vacations': {'10': {'guild_id': 1, 'end_at': 1700000000, 'admin_message_id': 5, 'duration': "неделю"}},
+        'verified': {'30': {'verified_at': 1700000000}},
+    })
+
+    assert state['version'] == STATE_VERSION
+    assert list(state['vacations']) == ['1:10']
+    assert state['vacations']['1:10']['end_at'] == 1700000000
+    # Сервер верификации неизвестен: ключ остается прежним до сверки серверов
+    assert list(state['verified']) == ['30']
+
+
+def test_member_key_round_trip():
+    assert parse_member_key(member_key(1, 2)) == (1, 2)
+    assert parse_member_key('30') is None
+
+
+def test_migrate_current_state_untouched():
+    state = {'version': STATE_VERSION, 'searches': {'20': {'author_id': 99}}}
+    assert migrate_state(state)['searches']['20'] == {'author_id': 99}
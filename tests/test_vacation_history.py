@@ -0,0 +1,69 @@
+import threading
+
+from vacation_history import VacationHistory
+
+DAY = 86400
+
+
+def make_history(tmp_path):
+    history = VacationHistory(str(tmp_path / 'history.db'))
+    history.load()
+    return history
+
+
+def test_overlapping_finds_long_vacation_started_before_window(tmp_path):
+    history = make_history(tmp_path)
+    history.record_start(1, 10, 0, 30 * DAY, "2 недели")
+    history.record_start(1, 20, 20 * DAY, 23 * DAY, "1-3 дня")
+    history.record_start(1, 30, 40 * DAY, 47 * DAY, "неделю")
+    history.record_start(2, 40, 20 * DAY, 23 * DAY, "1-3 дня")
+
+    rows = history.overlapping(1, 21 * DAY, 22 * DAY)
+    assert [row[0] for row in rows] == [10, 20]
+
+
+def test_window_bounds_are_half_open(tmp_path):
+    history = make_history(tmp_path)
+    history.record_start(1, 10, 10 * DAY, 17 * DAY, "неделю")
+
+    assert history.overlapping(1, 17 * DAY, 18 * DAY) == []
+    assert history.overlapping(1, 9 * DAY, 10 * DAY) == []
+    assert len(history.away_at(1, 10 * DAY)) == 1
+
+
+def test_record_end_shortens_current_vacation(tmp_path):
+    history = make_history(tmp_path)
+    history.record_start(1, 10, 10 * DAY, 24 * DAY, "2 недели")
+
+    assert history.record_end(1, 10, 12 * DAY) == 1
+    assert history.away_at(1, 13 * DAY) == []
+    assert history.member_history(1, 10) == [(10, 10 * DAY, 12 * DAY, "2 недели")]
+
+
+def test_load_restores_max_duration(tmp_path):
+    history = make_history(tmp_path)
+    history.record_start(1, 10, 0, 14 * DAY, "2 недели")
+
+    reloaded = make_history(tmp_path)
+    assert reloaded.max_duration == 14 * DAY
+    assert len(reloaded.overlapping(1, 13 * DAY, 20 * DAY)) == 1
+
+
+def test_member_history_newest_first(tmp_path):
+    history = make_history(tmp_path)
+    for start in (0, 30, 60):
+        history.record_start(1, 10, start * DAY, (start + 3) * DAY, "1-3 дня")
+
+    assert [row[1] for row in history.member_history(1, 10, limit=2)] == [60 * DAY, 30 * DAY]
+
+
+def test_connection_per_thread(tmp_path):
+    history = make_history(tmp_path)
+    history.record_start(1, 10, 0, 3 * DAY, "1-3 дня")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(history.away_at(1, DAY)))
+    thread.start()
+    thread.join()
+
+    assert len(results[0]) == 1
+    assert history.connection() is history.connection()
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from validation import parse_date, parse_verification_text
+
+
+def test_verification_text_ok():
+    assert parse_verification_text("  Top_Fragger (Иван) ") == ("Top_Fragger", "Иван", None)
+
+
+def test_verification_text_errors():
+    assert parse_verification_text("Player Алексей") == (None, None, 'format')
+    assert parse_verification_text("ab (Иван)")[2] == 'nickname_length'
+    assert parse_verification_text("Player (Я)")[2] == 'name_length'
+    assert parse_verification_text("Игрок (Иван)")[2] == 'format'
+
+
+def test_parse_date_formats():
+    assert parse_date("01.12.2025 18:30") == datetime(2025, 12, 1, 18, 30)
+    assert parse_date("01.12.2025") == datetime(2025, 12, 1)
+    assert parse_date("01.12.2025", end_of_day=True) == datetime(2025, 12, 2)
+    assert parse_date("01.12.2025 18:30", end_of_day=True) == datetime(2025, 12, 1, 18, 30)
+    assert parse_date("завтра") is None
+
+
+def test_parse_date_current_year():
+    assert parse_date("05.03") == datetime(datetime.now().year, 3, 5)
+
+
+def test_parse_date_leap_day(monkeypatch):
+    class LeapYear(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2028, 1, 1)
+
+    monkeypatch.setattr('validation.datetime', LeapYear)
+    assert parse_date("29.02") == datetime(2028, 2, 29)
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from voice_stats import VoiceSessionTracker
+
+
+def ts(*args):
+    return int(datetime(*args).timestamp())
+
+
+def make_tracker(tmp_path, now):
+    tracker = VoiceSessionTracker(str(tmp_path / 'voice.db'))
+    tracker.load(now=now)
+    return tracker
+
+
+def test_session_accumulates(tmp_path):
+    tracker = make_tracker(tmp_path, ts(2025, 11, 20, 12))
+    tracker.on_voice_event(1, 10, None, 'squad', now=ts(2025, 11, 20, 12))
+    tracker.on_voice_event(1, 10, 'squad', 'duo', now=ts(2025, 11, 20, 12, 30))
+    tracker.on_voice_event(1, 10, 'duo', None, now=ts(2025, 11, 20, 13))
+
+    assert tracker.user_totals(1, 10, 'day') == {'squad': 1800, 'duo': 1800}
+    assert not tracker.sessions
+    assert tracker.events == 3
+
+
+def test_session_split_at_midnight(tmp_path):
+    tracker = make_tracker(tmp_path, ts(2025, 11, 20, 23))
+    tracker.start_session(1, 10, 'squad', now=ts(2025, 11, 20, 23, 30))
+    tracker.end_session(1, 10, now=ts(2025, 11, 21, 0, 30))
+
+    assert tracker.pending[(1, '2025-11-20', 10, 'squad')] == 1800
+    assert tracker.pending[(1, '2025-11-21', 10, 'squad')] == 1800
+    # Наступили новые сутки: в дневной сумме только время после полуночи
+    assert tracker.user_totals(1, 10, 'day') == {'squad': 1800}
+    assert tracker.user_totals(1, 10, 'week') == {'squad': 3600}
+
+
+def test_flush_and_reload(tmp_path):
+    now = ts(2025, 11, 20, 12)
+    tracker = make_tracker(tmp_path, now)
+    tracker.start_session(1, 10, 'squad', now=now)
+    tracker.start_session(1, 20, 'duo', now=now)
+    batch = tracker.take_pending(now=now + 600)
+    tracker.write_batch(batch)
+
+    # Открытые сессии продолжаются с момента сброса
+    assert tracker.sessions[(1, 10)] == ('squad', now + 600)
+    assert not tracker.pending
+
+    reloaded = make_tracker(tmp_path, now + 600)
+    assert reloaded.user_totals(1, 10, 'day') == {'squad': 600}
+    assert reloaded.top_users(1, 'week') == [(600, 20), (600, 10)]
+
+
+def test_restore_pending_after_failed_write(tmp_path):
+    now = ts(2025, 11, 20, 12)
+    tracker = make_tracker(tmp_path, now)
+    tracker.on_voice_event(1, 10, None, 'squad', now=now)
+    tracker.on_voice_event(1, 10, 'squad', None, now=now + 60)
+    batch = tracker.take_pending(now=now + 60)
+    tracker.restore_pending(batch)
+
+    assert tracker.pending == {(1, '2025-11-20', 10, 'squad'): 60}
+
+
+def test_top_limit(tmp_path):
+    now = ts(2025, 11, 20, 12)
+    tracker = VoiceSessionTracker(str(tmp_path / 'voice.db'), top_size=2)
+    tracker.load(now=now)
+    for user_id, minutes in ((1, 5), (2, 15), (3, 10)):
+        tracker.on_voice_event(7, user_id, None, 'squad', now=now)
+        tracker.on_voice_event(7, user_id, 'squad', None, now=now + minutes * 60)
+    tracker.refresh_top()
+
+    assert tracker.top_users(7, 'day') == [(900, 2), (600, 3)]
+    assert tracker.top_users(8, 'day') == []
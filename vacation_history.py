@@ -0,0 +1,109 @@
+"""История отпусков в SQLite: кто в отпуске на дату, в окне события и по участнику.
+
+Модуль не зависит от discord.py: хранит только ID и время в секундах epoch.
+
+Отпуск — интервал [start_at, end_at). Индекс по (guild_id, start_at) сам по
+себе не находит интервалы, начавшиеся задолго до окна, поэтому используется
+верхняя граница длительности: интервал, пересекающий окно [from, to), начался
+не раньше from - max_duration. Запрос читает из индекса только этот диапазон —
+O(log n + k) при любой длине истории. Досрочное возвращение только укорачивает
+интервал, так что граница остается верной.
+"""
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vacation_history (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    start_at INTEGER NOT NULL,
+    end_at INTEGER NOT NULL,
+    duration TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS vacation_history_start ON vacation_history (guild_id, start_at);
+CREATE INDEX IF NOT EXISTS vacation_history_user ON vacation_history (guild_id, user_id, start_at);
+"""
+
+SELECT_OVERLAPPING = """
+SELECT user_id, start_at, end_at, duration FROM vacation_history
+WHERE guild_id = ? AND start_at BETWEEN ? AND ? AND end_at > ?
+ORDER BY start_at
+"""
+
+SELECT_MEMBER = """
+SELECT user_id, start_at, end_at, duration FROM vacation_history
+WHERE guild_id = ? AND user_id = ?
+ORDER BY start_at DESC LIMIT ?
+"""
+
+
+class VacationHistory:
+    """Интервалы отпусков с запросами по пересечению"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.max_duration = 0
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+        self.local = threading.local()
+
+    def connect(self):
+        """Новое соединение; схема создается один раз за время жизни объекта"""
+        connection = sqlite3.connect(self.db_path)
+        with self.schema_lock:
+            if not self.schema_ready:
+                connection.executescript(SCHEMA)
+                self.schema_ready = True
+        return connection
+
+    def connection(self):
+        """Соединение текущего потока: запросы идут через asyncio.to_thread, а соединение SQLite привязано к потоку"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self.connect()
+        return connection
+
+    def _run(self, query, params, fetch=True):
+        connection = self.connection()
+        with connection:
+            cursor = connection.execute(query, params)
+            return cursor.fetchall() if fetch else cursor.rowcount
+
+    def load(self):
+        """Читает самую длинную длительность; остальная история остается на диске"""
+        rows = self._run("SELECT MAX(end_at - start_at) FROM vacation_history", ())
+        self.max_duration = rows[0][0] or 0
+        return self.max_duration
+
+    # ---------- запись ----------
+
+    def record_start(self, guild_id, user_id, start_at, end_at, duration):
+        """Добавляет отпуск с плановой датой окончания"""
+        self.max_duration = max(self.max_duration, end_at - start_at)
+        self._run(
+            "INSERT INTO vacation_history (guild_id, user_id, start_at, end_at, duration) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, user_id, start_at, end_at, duration), fetch=False
+        )
+
+    def record_end(self, guild_id, user_id, now):
+        """Досрочное возвращение: обрезает текущий отпуск участника до now"""
+        return self._run(
+            "UPDATE vacation_history SET end_at = ? WHERE guild_id = ? AND user_id = ? AND start_at <= ? AND end_at > ?",
+            (now, guild_id, user_id, now, now), fetch=False
+        )
+
+    # ---------- запросы ----------
+
+    def overlapping(self, guild_id, start, end):
+        """Отпуска, пересекающие окно [start, end): список (user_id, start_at, end_at, duration)"""
+        return self._run(SELECT_OVERLAPPING, (guild_id, start - self.max_duration, end - 1, start))
+
+    def away_at(self, guild_id, moment):
+        """Отпуска, идущие в момент moment"""
+        return self.overlapping(guild_id, moment, moment + 1)
+
+    def member_history(self, guild_id, user_id, limit=20):
+        """Последние отпуска участника, новые первыми"""
+        return self._run(SELECT_MEMBER, (guild_id, user_id, limit))
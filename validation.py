@@ -0,0 +1,73 @@
+"""Проверка пользовательского ввода: заранее скомпилированные шаблоны и таблицы разбора.
+
+Модуль не зависит от discord.py, поэтому его можно использовать и в
+расширениях, и в импорте списка игроков, и в бенчмарках.
+"""
+import re
+from datetime import datetime, timedelta
+
+# никнейм (Имя): латиница, цифры и _-. в нике, кириллица в имени
+VERIFICATION_RE = re.compile(r'^([a-zA-Z0-9_\-\.]+)\s+\(([а-яА-ЯёЁ\s]+)\)$')
+
+NICKNAME_LENGTH = (3, 20)
+REAL_NAME_LENGTH = (2, 15)
+
+# Варианты написания длительности отпуска -> (длительность, как показывать)
+VACATION_DURATIONS = {}
+for aliases, delta, display in (
+    (('3д', '3дня', '3 дня'), timedelta(days=3), "1-3 дня"),
+    (('неделя', '7д', '7дней'), timedelta(weeks=1), "неделю"),
+    (('2недели', '2 недели', '14д', '14дней'), timedelta(weeks=2), "2 недели"),
+):
+    for alias in aliases:
+        VACATION_DURATIONS[alias] = (delta, display)
+
+DATE_FORMATS = ('%d.%m.%Y %H:%M', '%d.%m.%Y')
+
+
+def parse_verification_text(text):
+    """Разбирает строку «никнейм (имя)», возвращает (никнейм, имя, ошибка)"""
+    match = VERIFICATION_RE.match(text.strip())
+    if not match:
+        return None, None, 'format'
+
+    pubg_nickname, real_name = match.groups()
+
+    if not NICKNAME_LENGTH[0] <= len(pubg_nickname) <= NICKNAME_LENGTH[1]:
+        return pubg_nickname, real_name, 'nickname_length'
+
+    if not REAL_NAME_LENGTH[0] <= len(real_name) <= REAL_NAME_LENGTH[1]:
+        return pubg_nickname, real_name, 'name_length'
+
+    return pubg_nickname, real_name, None
+
+
+def format_server_nickname(pubg_nickname, real_name):
+    """Ник, который игрок должен поставить на сервере"""
+    return f"{pubg_nickname} ({real_name})"
+
+
+def parse_vacation_duration(text):
+    """Длительность отпуска из ввода: (timedelta, как показывать) или None"""
+    return VACATION_DURATIONS.get(text.lower())
+
+
+def parse_date(text, end_of_day=False):
+    """Дата из ввода «дд.мм.гггг [чч:мм]» или «дд.мм» (текущий год), иначе None.
+
+    Без времени берется начало дня, с end_of_day — начало следующего дня,
+    чтобы дата окончания окна входила в него целиком.
+    """
+    text = text.strip()
+    # Год дописываем до разбора: strptime без года берет 1900-й, и 29.02 не разбирается
+    if text.count('.') == 1:
+        text = f"{text}.{datetime.now().year}"
+    for date_format in DATE_FORMATS:
+        try:
+            moment = datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+        if end_of_day and '%H' not in date_format:
+            moment += timedelta(days=1)
+        return moment
+    return None
@@ -0,0 +1,218 @@
+"""Учет голосовой активности: сессии и суммы в памяти, сводки в SQLite.
+
+Трекер не зависит от discord.py: бот передает ему только ID и тип канала.
+Суммы за текущий день и неделю держатся в памяти, топы пересчитываются
+при сбросе на диск, поэтому запросы статистики не обращаются к базе.
+"""
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS voice_daily (
+    guild_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    channel_type TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, day, user_id, channel_type)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS voice_weekly (
+    guild_id INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    channel_type TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, week, user_id, channel_type)
+) WITHOUT ROWID;
+"""
+
+UPSERT_DAILY = """
+INSERT INTO voice_daily (guild_id, day, user_id, channel_type, seconds) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (guild_id, day, user_id, channel_type) DO UPDATE SET seconds = seconds + excluded.seconds
+"""
+
+UPSERT_WEEKLY = """
+INSERT INTO voice_weekly (guild_id, week, user_id, channel_type, seconds) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (guild_id, week, user_id, channel_type) DO UPDATE SET seconds = seconds + excluded.seconds
+"""
+
+PERIODS = ('day', 'week')
+
+
+def day_key(moment):
+    """Ключ дня: 2025-11-20"""
+    return moment.strftime('%Y-%m-%d')
+
+
+def week_key(moment):
+    """Ключ ISO-недели: 2025-W47"""
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def day_window(timestamp):
+    """Границы календарного дня, в который попадает момент: (начало, конец, день, неделя)"""
+    moment = datetime.fromtimestamp(timestamp)
+    midnight = datetime.combine(moment.date(), datetime.min.time())
+    next_midnight = midnight + timedelta(days=1)
+    return int(midnight.timestamp()), int(next_midnight.timestamp()), day_key(moment), week_key(moment)
+
+
+def nested_totals():
+    """guild_id -> user_id -> channel_type -> секунды"""
+    return defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+
+
+class VoiceSessionTracker:
+    """Отслеживает голосовые сессии и копит суммы по участникам и типам каналов"""
+
+    def __init__(self, db_path, top_size=10):
+        self.db_path = db_path
+        self.top_size = top_size
+        self.sessions = {}
+        self.pending = defaultdict(int)
+        self.totals = {period: nested_totals() for period in PERIODS}
+        self.top = {period: {} for period in PERIODS}
+        self.keys = {'day': None, 'week': None}
+        self.events = 0
+        self.window = (0, 0, None, None)
+
+    # ---------- работа с базой ----------
+
+    def connect(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def load(self, now=None):
+        """Загружает суммы за текущие день и неделю из базы"""
+        moment = datetime.fromtimestamp(now or time.time())
+        self.keys = {'day': day_key(moment), 'week': week_key(moment)}
+        self.totals = {period: nested_totals() for period in PERIODS}
+
+        with self.connect() as connection:
+            for period, table, column in (('day', 'voice_daily', 'day'), ('week', 'voice_weekly', 'week')):
+                rows = connection.execute(
+                    f"SELECT guild_id, user_id, channel_type, seconds FROM {table} WHERE {column} = ?",
+                    (self.keys[period],)
+                )
+                for guild_id, user_id, channel_type, seconds in rows:
+                    self.totals[period][guild_id][user_id][channel_type] += seconds
+        connection.close()
+
+        # Несброшенные секунды тоже входят в суммы
+        for (guild_id, day, user_id, channel_type), seconds in self.pending.items():
+            week = week_key(datetime.strptime(day, '%Y-%m-%d'))
+            self._add_to_totals(guild_id, day, week, user_id, channel_type, seconds)
+
+        self.refresh_top()
+
+    def write_batch(self, batch):
+        """Записывает накопленные приращения одной транзакцией (можно вызывать из другого потока)"""
+        if not batch:
+            return
+
+        daily_rows = []
+        weekly = defaultdict(int)
+        for (guild_id, day, user_id, channel_type), seconds in batch.items():
+            daily_rows.append((guild_id, day, user_id, channel_type, seconds))
+            weekly[(guild_id, week_key(datetime.strptime(day, '%Y-%m-%d')), user_id, channel_type)] += seconds
+        weekly_rows = [key + (seconds,) for key, seconds in weekly.items()]
+
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(UPSERT_DAILY, daily_rows)
+                connection.executemany(UPSERT_WEEKLY, weekly_rows)
+        finally:
+            connection.close()
+
+    # ---------- события ----------
+
+    def on_voice_event(self, guild_id, user_id, before_type, after_type, now=None):
+        """Обрабатывает переход участника между голосовыми каналами (тип None — вне учета)"""
+        now = int(now or time.time())
+        self.events += 1
+
+        if before_type is not None:
+            self.end_session(guild_id, user_id, now)
+        if after_type is not None:
+            self.sessions[(guild_id, user_id)] = (after_type, now)
+
+    def start_session(self, guild_id, user_id, channel_type, now=None):
+        self.sessions[(guild_id, user_id)] = (channel_type, int(now or time.time()))
+
+    def end_session(self, guild_id, user_id, now=None):
+        session = self.sessions.pop((guild_id, user_id), None)
+        if session:
+            channel_type, started_at = session
+            self._accumulate(guild_id, user_id, channel_type, started_at, int(now or time.time()))
+
+    def take_pending(self, now=None):
+        """Закрывает текущий отрезок открытых сессий и забирает накопленные приращения"""
+        now = int(now or time.time())
+        for (guild_id, user_id), (channel_type, started_at) in list(self.sessions.items()):
+            self._accumulate(guild_id, user_id, channel_type, started_at, now)
+            self.sessions[(guild_id, user_id)] = (channel_type, now)
+
+        batch = self.pending
+        self.pending = defaultdict(int)
+        self._roll(datetime.fromtimestamp(now))
+        self.refresh_top()
+        return batch
+
+    def restore_pending(self, batch):
+        """Возвращает приращения, которые не удалось записать, в очередь на следующий сброс"""
+        for key, seconds in batch.items():
+            self.pending[key] += seconds
+
+    def _accumulate(self, guild_id, user_id, channel_type, start, end):
+        # Сессия делится по календарным дням; границы текущего дня кэшируются
+        while start < end:
+            if not self.window[0] <= start < self.window[1]:
+                self.window = day_window(start)
+            _, day_end, day, week = self.window
+            chunk_end = min(end, day_end)
+
+            if self.keys['day'] is None or day > self.keys['day']:
+                self._roll(datetime.fromtimestamp(start))
+            self.pending[(guild_id, day, user_id, channel_type)] += chunk_end - start
+            self._add_to_totals(guild_id, day, week, user_id, channel_type, chunk_end - start)
+            start = chunk_end
+
+    def _add_to_totals(self, guild_id, day, week, user_id, channel_type, seconds):
+        if day == self.keys['day']:
+            self.totals['day'][guild_id][user_id][channel_type] += seconds
+        if week == self.keys['week']:
+            self.totals['week'][guild_id][user_id][channel_type] += seconds
+
+    def _roll(self, moment):
+        """Начинает новые сутки или неделю, когда они наступили"""
+        for period, key in (('day', day_key(moment)), ('week', week_key(moment))):
+            if self.keys[period] != key:
+                self.keys[period] = key
+                self.totals[period] = nested_totals()
+
+    # ---------- запросы ----------
+
+    def refresh_top(self):
+        """Пересчитывает топы для каждого сервера и периода"""
+        for period in PERIODS:
+            self.top[period] = {
+                guild_id: sorted(
+                    ((sum(by_type.values()), user_id) for user_id, by_type in users.items()),
+                    reverse=True
+                )[:self.top_size]
+                for guild_id, users in self.totals[period].items()
+            }
+
+    def top_users(self, guild_id, period, limit=None):
+        """Топ участников за период: список (секунды, user_id)"""
+        return self.top[period].get(guild_id, [])[:limit or self.top_size]
+
+    def user_totals(self, guild_id, user_id, period):
+        """Секунды участника за период по типам каналов"""
+        return dict(self.totals[period].get(guild_id, {}).get(user_id, {}))